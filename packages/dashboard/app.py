@@ -6,6 +6,7 @@ import hashlib
 from datetime import datetime
 import json
 import socket
+from functools import partial
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -300,7 +301,7 @@ class MainWindow(QMainWindow):
             self.update_devices_table()
             self.update_tabs()
 
-    def edit_device(self, index):
+    def edit_device(self, index, checked=False):
         """Show dialog to edit a device"""
         device = self.devices[index]
         dialog = DeviceDialog(self, device=device)
@@ -336,24 +337,32 @@ class MainWindow(QMainWindow):
         self.devicesTable.setRowCount(len(self.devices))
 
         for row, device in enumerate(self.devices):
-            name_item = QTableWidgetItem(device['name'])
-            name_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-            self.devicesTable.setItem(row, 0, name_item)
-
-            status_item = QTableWidgetItem(device.get('status', 'Disconnected'))
-            status_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
-            status_text = status_item.text()
+            # Reuse the row's existing items and button, only creating them for new rows
+            name_item = self.devicesTable.item(row, 0)
+            if name_item is None:
+                name_item = QTableWidgetItem()
+                name_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+                self.devicesTable.setItem(row, 0, name_item)
+            name_item.setText(device['name'])
+
+            status_item = self.devicesTable.item(row, 1)
+            if status_item is None:
+                status_item = QTableWidgetItem()
+                status_item.setFlags(Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable)
+                self.devicesTable.setItem(row, 1, status_item)
+            status_text = device.get('status', 'Disconnected')
+            status_item.setText(status_text)
 
             if status_text == "Connected":
                 status_item.setForeground(QColor("#00AA00"))
             else:
                 status_item.setForeground(QColor("#AA0000"))
-            self.devicesTable.setItem(row, 1, status_item)
 
-            edit_btn = QPushButton("Edit")
-            edit_btn.clicked.connect(lambda checked, idx=row: self.edit_device(idx))
-            self.devicesTable.setCellWidget(row, 2, edit_btn)
-            self.devicesTable.setRowHeight(row, 40)
+            if self.devicesTable.cellWidget(row, 2) is None:
+                edit_btn = QPushButton("Edit")
+                edit_btn.clicked.connect(partial(self.edit_device, row))
+                self.devicesTable.setCellWidget(row, 2, edit_btn)
+                self.devicesTable.setRowHeight(row, 40)
 
         if len(self.devices) > 0:
             self.devicesTable.blockSignals(True)
@@ -569,9 +578,9 @@ class MainWindow(QMainWindow):
                 # Create new manager
                 manager = DeviceConnectionManager(device_name, ip_address, port)
 
-                manager.connected.connect(lambda: self._on_device_connected(device_index))
-                manager.disconnected.connect(lambda: self._on_device_disconnected(device_index))
-                manager.message_received.connect(lambda msg, idx=device_index: self._on_device_message(idx, msg))
+                manager.connected.connect(partial(self._on_device_connected, device_index))
+                manager.disconnected.connect(partial(self._on_device_disconnected, device_index))
+                manager.message_received.connect(partial(self._on_device_message, device_index))
 
                 self.connection_managers[device_name] = manager
                 manager.connect()
@@ -594,7 +603,6 @@ class MainWindow(QMainWindow):
                 tab.set_connection_state(True)
                 tab.log(f"Connected to {device_name}", "success")
 
-                from shared.managers import ExperimentManager
                 app_data_dir = get_app_data_dir()
                 experiments_dir = os.path.join(app_data_dir, 'experiments')
                 os.makedirs(experiments_dir, exist_ok=True)
@@ -642,16 +650,15 @@ class MainWindow(QMainWindow):
             msg_type = message.get('type')
 
             if msg_type == "input_state":
-                states = message.get('data', {})
-                for key, value in states.items():
-                    tab.update_input_state(key, value)
+                tab.update_input_states(message.get('data', {}))
 
-                # Extract and store version information
+                # Extract and store version information, only relabeling when it changes
                 version = message.get('version', 'Unknown')
-                device['version'] = version
-                # Update version label if showing this device
-                if self.current_device_name == device_name and self.device_version_label:
-                    self.device_version_label.setText(f"<b>Software Version:</b> {version}")
+                if version != device.get('version'):
+                    device['version'] = version
+                    # Update version label if showing this device
+                    if self.current_device_name == device_name and self.device_version_label:
+                        self.device_version_label.setText(f"<b>Software Version:</b> {version}")
                 # Just update button states, don't recreate
                 if self.current_device_name == device_name and self.device_connect_btn:
                     status = device.get('status', 'Disconnected')
@@ -679,7 +686,7 @@ class MainWindow(QMainWindow):
 
                 if status == "started":
                     tab.set_experiment_started()
-                elif status in ["completed", "stopped"]:
+                elif status in {"completed", "stopped"}:
                     tab.set_experiment_stopped()
 
             elif msg_type == "trial_start":
@@ -928,7 +935,7 @@ class MainWindow(QMainWindow):
         tab.test_requested.connect(self._on_test_requested)
         tab.experiment_stop_requested.connect(self._on_experiment_stop_requested)
         tab.experiment_start_requested.connect(self._on_experiment_start_requested)
-        tab.new_experiment_requested.connect(lambda: self._on_experiment_new_requested())
+        tab.new_experiment_requested.connect(self._on_experiment_new_requested)
         tab.edit_experiment_requested.connect(self._on_experiment_edit_requested)
 
         return tab
@@ -5,10 +5,52 @@ from PyQt6.QtWidgets import (
     QComboBox, QLineEdit, QTextEdit, QSizePolicy, QGridLayout
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer
-from shared.constants import TEST_STATES, TEST_COMMANDS
-from typing import Dict, Any
+from PyQt6.QtGui import QColor, QFont, QTextCursor
+from shared.constants import TEST_STATES
+from functools import partial
+import queue
 import time
 
+# Indicator colors
+COLOR_ACTIVE = "green"
+COLOR_INACTIVE = "red"
+COLOR_PASSED = "green"
+COLOR_FAILED = "red"
+COLOR_RUNNING = "yellow"
+COLOR_NOT_TESTED = "blue"
+
+# Test indicator color for each test state, anything else shows as not tested
+TEST_STATE_COLORS = {
+    TEST_STATES["FAILED"]: COLOR_FAILED,
+    TEST_STATES["PASSED"]: COLOR_PASSED,
+    TEST_STATES["RUNNING"]: COLOR_RUNNING,
+}
+
+# Test states that end a test
+FINISHED_TEST_STATES = frozenset((TEST_STATES["PASSED"], TEST_STATES["FAILED"]))
+
+# Indicator style sheets by color, built once
+INDICATOR_STYLES = {
+    color: f"color: {color}; font-size: 16pt;"
+    for color in (COLOR_ACTIVE, COLOR_INACTIVE, COLOR_PASSED, COLOR_FAILED, COLOR_RUNNING, COLOR_NOT_TESTED)
+}
+
+# Style sheets and widths shared by the statistics value labels
+VALUE_STYLE = "font-weight: bold;"
+TIMER_STYLE = "font-weight: bold; color: #0066CC;"
+STAT_LABEL_WIDTH = 200
+STAT_VALUE_WIDTH = 60
+VALUE_ALIGNMENT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+# Console prefix and text color for each log state
+LOG_STATE_STYLES = {
+    "info": ("[Info] ", QColor(224, 224, 224)),
+    "success": ("[Success] ", QColor(0, 255, 0)),
+    "error": ("[Error] ", QColor(255, 68, 68)),
+    "warning": ("[Warning] ", QColor(255, 170, 0)),
+    "debug": ("[Debug] ", QColor(170, 170, 170))
+}
+
 
 class DeviceTab(QWidget):
     """Tab widget representing a single device with all its controls"""
@@ -27,6 +69,12 @@ class DeviceTab(QWidget):
         self.test_states = {}
         self._connected = False
 
+        # Current color of each indicator, so unchanged states skip restyling
+        self._indicator_colors = {}
+
+        # Text currently shown by each statistics label
+        self._stat_texts = {}
+
         # Timer state
         self.experiment_start_time = None
         self.current_trial_start_time = None
@@ -37,6 +85,16 @@ class DeviceTab(QWidget):
         self.timer.timeout.connect(self._update_timers)
         self.timer.start(1000)  # Update every second
 
+        # Bracketed console timestamp for the current second, reformatted only when the second changes
+        self._log_timestamp_second = None
+        self._log_timestamp = ""
+
+        # Console messages waiting to be written, drained in batches on the GUI thread
+        self._log_queue = queue.SimpleQueue()
+        self._log_timer = QTimer()
+        self._log_timer.timeout.connect(self._drain_log_queue)
+        self._log_timer.start(50)
+
         self._create_widgets()
         self._create_layout()
 
@@ -114,6 +172,9 @@ class DeviceTab(QWidget):
                 font-size: 10pt;
             }
         """)
+        font = self.console.font()
+        font.setWeight(QFont.Weight.Medium)
+        self.console.setFont(font)
         self.log("Console ready...", "info")
 
     def _create_layout(self):
@@ -168,7 +229,7 @@ class DeviceTab(QWidget):
             state_layout.addWidget(lbl)
 
             indicator = QLabel("●")
-            indicator.setStyleSheet("color: red; font-size: 16pt;")
+            self._set_indicator_color(indicator, COLOR_INACTIVE)
             self.input_indicators[key] = indicator
             state_layout.addWidget(indicator)
             state_layout.addStretch()
@@ -217,14 +278,14 @@ class DeviceTab(QWidget):
                 test_grid.addWidget(spacer2, row, 2)
 
             indicator = QLabel("●")
-            indicator.setStyleSheet("color: blue; font-size: 16pt;")
+            self._set_indicator_color(indicator, COLOR_NOT_TESTED)
             indicator.setFixedWidth(20)
             self.test_indicators[test_key] = indicator
             test_grid.addWidget(indicator, row, 3)
 
             test_btn = QPushButton("Test")
             test_btn.setFixedWidth(60)
-            test_btn.clicked.connect(lambda checked, key=test_key: self._on_test_clicked(key))
+            test_btn.clicked.connect(partial(self._on_test_clicked, test_key))
             self.test_buttons[test_key] = test_btn
             test_grid.addWidget(test_btn, row, 4)
 
@@ -254,51 +315,20 @@ class DeviceTab(QWidget):
         ]
 
         for row, (stat_label, stat_key) in enumerate(statistics):
-            lbl = QLabel(stat_label + ":")
-            lbl.setMinimumWidth(200)
-            stats_grid.addWidget(lbl, row, 0, Qt.AlignmentFlag.AlignLeft)
-
-            value_label = QLabel("0")
-            value_label.setMinimumWidth(60)
-            value_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            value_label.setStyleSheet("font-weight: bold;")
-            self.stat_labels[stat_key] = value_label
-            stats_grid.addWidget(value_label, row, 1, Qt.AlignmentFlag.AlignRight)
-
-        # Add timer labels
-        timer_row = len(statistics)
-
-        total_time_lbl = QLabel("Experiment Time:")
-        total_time_lbl.setMinimumWidth(200)
-        stats_grid.addWidget(total_time_lbl, timer_row, 0, Qt.AlignmentFlag.AlignLeft)
-
-        self.total_experiment_time_label = QLabel("00:00:00")
-        self.total_experiment_time_label.setMinimumWidth(60)
-        self.total_experiment_time_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        self.total_experiment_time_label.setStyleSheet("font-weight: bold; color: #0066CC;")
-        stats_grid.addWidget(self.total_experiment_time_label, timer_row, 1, Qt.AlignmentFlag.AlignRight)
-
-        trial_row = timer_row + 1
-
-        active_trial_lbl = QLabel("Active Trial:")
-        active_trial_lbl.setMinimumWidth(200)
-        stats_grid.addWidget(active_trial_lbl, trial_row, 0, Qt.AlignmentFlag.AlignLeft)
-
-        self.active_trial_type_label = QLabel("None")
-        self.active_trial_type_label.setMinimumWidth(100)
-        self.active_trial_type_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        self.active_trial_type_label.setStyleSheet("font-weight: bold;")
-        stats_grid.addWidget(self.active_trial_type_label, trial_row, 1, Qt.AlignmentFlag.AlignRight)
-
-        trial_time_lbl = QLabel("Trial Time:")
-        trial_time_lbl.setMinimumWidth(200)
-        stats_grid.addWidget(trial_time_lbl, trial_row + 1, 0, Qt.AlignmentFlag.AlignLeft)
-
-        self.active_trial_time_label = QLabel("00:00:00")
-        self.active_trial_time_label.setMinimumWidth(60)
-        self.active_trial_time_label.setAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-        self.active_trial_time_label.setStyleSheet("font-weight: bold; color: #0066CC;")
-        stats_grid.addWidget(self.active_trial_time_label, trial_row + 1, 1, Qt.AlignmentFlag.AlignRight)
+            self.stat_labels[stat_key] = self._add_stat_row(stats_grid, row, stat_label + ":", "0")
+
+        # Add timer labels, as (label, initial value, value width, value style) after the statistics
+        timer_rows = [
+            ("Experiment Time:", "00:00:00", STAT_VALUE_WIDTH, TIMER_STYLE),
+            ("Active Trial:", "None", 100, VALUE_STYLE),
+            ("Trial Time:", "00:00:00", STAT_VALUE_WIDTH, TIMER_STYLE)
+        ]
+
+        timer_labels = [
+            self._add_stat_row(stats_grid, row, row_label, initial_value, value_width, value_style)
+            for row, (row_label, initial_value, value_width, value_style) in enumerate(timer_rows, start=len(statistics))
+        ]
+        self.total_experiment_time_label, self.active_trial_type_label, self.active_trial_time_label = timer_labels
 
         stats_layout.addLayout(stats_grid)
 
@@ -320,7 +350,20 @@ class DeviceTab(QWidget):
         main_layout.addWidget(console_box)
         self.setLayout(main_layout)
 
-    def _on_test_clicked(self, test_key):
+    def _add_stat_row(self, grid, row, label, value, value_width=STAT_VALUE_WIDTH, value_style=VALUE_STYLE):
+        """Add a label and value row to the statistics grid, returning the value label"""
+        lbl = QLabel(label)
+        lbl.setMinimumWidth(STAT_LABEL_WIDTH)
+        grid.addWidget(lbl, row, 0, Qt.AlignmentFlag.AlignLeft)
+
+        value_label = QLabel(value)
+        value_label.setMinimumWidth(value_width)
+        value_label.setAlignment(VALUE_ALIGNMENT)
+        value_label.setStyleSheet(value_style)
+        grid.addWidget(value_label, row, 1, Qt.AlignmentFlag.AlignRight)
+        return value_label
+
+    def _on_test_clicked(self, test_key, checked=False):
         """Handle test button click"""
         self.set_test_buttons_enabled(False)
         self.test_running = True
@@ -334,12 +377,27 @@ class DeviceTab(QWidget):
         self.set_test_buttons_enabled(True)
         self.test_running = False
 
+    def _set_indicator_color(self, indicator, color):
+        """Set an indicator's color, skipping the style sheet update if unchanged"""
+        if self._indicator_colors.get(indicator) == color:
+            return
+        self._indicator_colors[indicator] = color
+        indicator.setStyleSheet(INDICATOR_STYLES[color])
+
     def update_input_state(self, state_key, value):
         """Update input state indicator"""
-        if state_key in self.input_indicators:
-            indicator = self.input_indicators[state_key]
-            color = "green" if value else "red"
-            indicator.setStyleSheet(f"color: {color}; font-size: 16pt;")
+        indicator = self.input_indicators.get(state_key)
+        if indicator:
+            self._set_indicator_color(indicator, COLOR_ACTIVE if value else COLOR_INACTIVE)
+
+    def update_input_states(self, states):
+        """Update the input state indicators from a full input state message"""
+        input_indicators = self.input_indicators
+        set_indicator_color = self._set_indicator_color
+        for state_key, value in states.items():
+            indicator = input_indicators.get(state_key)
+            if indicator:
+                set_indicator_color(indicator, COLOR_ACTIVE if value else COLOR_INACTIVE)
 
     def update_test_state(self, test_key, state):
         """Update test indicator"""
@@ -347,18 +405,9 @@ class DeviceTab(QWidget):
             indicator = self.test_indicators[test_key]
             self.test_states[test_key] = state
 
-            if state == TEST_STATES["FAILED"]:
-                color = "red"
-            elif state == TEST_STATES["PASSED"]:
-                color = "green"
-            elif state == TEST_STATES["RUNNING"]:
-                color = "yellow"
-            else:
-                color = "blue"
-
-            indicator.setStyleSheet(f"color: {color}; font-size: 16pt;")
+            self._set_indicator_color(indicator, TEST_STATE_COLORS.get(state, COLOR_NOT_TESTED))
 
-            if state in [TEST_STATES["PASSED"], TEST_STATES["FAILED"]]:
+            if state in FINISHED_TEST_STATES:
                 self.test_running = False
                 self.set_test_buttons_enabled(True)
 
@@ -370,40 +419,53 @@ class DeviceTab(QWidget):
             self.reset_btn.setEnabled(enabled)
 
     def update_statistics(self, stats):
-        """Update statistics display"""
+        """Update statistics display, only setting the labels whose value changed"""
+        stat_texts = self._stat_texts
         for key, label in self.stat_labels.items():
             if label and key in stats:
-                label.setText(str(stats[key]))
+                text = str(stats[key])
+                if stat_texts.get(key) != text:
+                    stat_texts[key] = text
+                    label.setText(text)
 
     def log(self, message, state="info"):
-        """Add message to console with color formatting"""
-        from datetime import datetime
-        from PyQt6.QtGui import QColor
-        from PyQt6.QtGui import QTextCursor
-
-        timestamp = datetime.now().strftime('%H:%M:%S')
-
-        log_state_map = {
-            "info": ("Info", QColor(224, 224, 224)),
-            "success": ("Success", QColor(0, 255, 0)),
-            "error": ("Error", QColor(255, 68, 68)),
-            "warning": ("Warning", QColor(255, 170, 0)),
-            "debug": ("Debug", QColor(170, 170, 170))
-        }
-
-        state_text, color = log_state_map.get(state, ("Info", QColor(224, 224, 224)))
-
-        text = f"[{timestamp}] [{state_text}] {message}\n"
-
-        self.console.moveCursor(QTextCursor.MoveOperation.End)
-        self.console.setTextColor(color)
-
-        from PyQt6.QtGui import QFont
-        font = self.console.font()
-        font.setWeight(QFont.Weight.Medium)
-        self.console.setFont(font)
+        """Queue a message for the console with color formatting, written by _drain_log_queue"""
+        prefix, color = LOG_STATE_STYLES.get(state) or LOG_STATE_STYLES["info"]
+        self._log_queue.put((color, f"{self._get_log_timestamp()}{prefix}{message}\n"))
+
+    def _get_log_timestamp(self):
+        """Get the bracketed console timestamp for the current second"""
+        second = int(time.time())
+        if second != self._log_timestamp_second:
+            self._log_timestamp = time.strftime('[%H:%M:%S] ', time.localtime(second))
+            self._log_timestamp_second = second
+        return self._log_timestamp
+
+    def _drain_log_queue(self):
+        """Write queued console messages, inserting each run of same-colored messages at once"""
+        log_queue = self._log_queue
+        if log_queue.empty():
+            return
 
-        self.console.insertPlainText(text)
+        # Group the queued messages into runs of the same color
+        runs = []
+        run_color = None
+        while True:
+            try:
+                color, text = log_queue.get_nowait()
+            except queue.Empty:
+                break
+            if color != run_color:
+                runs.append((color, []))
+                run_color = color
+            runs[-1][1].append(text)
+
+        # Insert each run at once, Qt merges the repaints until the next event loop pass
+        console = self.console
+        console.moveCursor(QTextCursor.MoveOperation.End)
+        for color, texts in runs:
+            console.setTextColor(color)
+            console.insertPlainText("".join(texts))
 
     def set_connection_state(self, connected):
         """Enable/disable controls based on connection state"""
@@ -494,7 +556,7 @@ class DeviceTab(QWidget):
         """Update timer displays every second"""
         if self.total_experiment_time_label:
             if self.experiment_start_time:
-                elapsed = time.time() - self.experiment_start_time
+                elapsed = time.monotonic() - self.experiment_start_time
                 hours = int(elapsed // 3600)
                 minutes = int((elapsed % 3600) // 60)
                 seconds = int(elapsed % 60)
@@ -504,7 +566,7 @@ class DeviceTab(QWidget):
 
         if self.active_trial_time_label:
             if self.current_trial_start_time:
-                elapsed = time.time() - self.current_trial_start_time
+                elapsed = time.monotonic() - self.current_trial_start_time
                 hours = int(elapsed // 3600)
                 minutes = int((elapsed % 3600) // 60)
                 seconds = int(elapsed % 60)
@@ -514,10 +576,10 @@ class DeviceTab(QWidget):
 
     def set_experiment_started(self):
         """Mark experiment as started"""
-        self.experiment_start_time = time.time()
+        self.experiment_start_time = time.monotonic()
         # If a trial has already started but timer hasn't, start it now
         if self.current_trial_type != "None" and self.current_trial_start_time is None:
-            self.current_trial_start_time = time.time()
+            self.current_trial_start_time = time.monotonic()
 
     def set_experiment_stopped(self):
         """Mark experiment as stopped"""
@@ -535,7 +597,7 @@ class DeviceTab(QWidget):
         self.current_trial_type = trial_name
         # Only start trial timer if experiment has already started
         if self.experiment_start_time:
-            self.current_trial_start_time = time.time()
+            self.current_trial_start_time = time.monotonic()
         if self.active_trial_type_label:
             self.active_trial_type_label.setText(trial_name)
 
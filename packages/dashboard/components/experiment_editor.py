@@ -289,7 +289,7 @@ class ExperimentEditor(QDialog):
 
         if filepath:
             try:
-                with open(filepath, 'w') as f:
+                with open(filepath, 'w', encoding='utf-8') as f:
                     f.write(self.current_experiment.to_json())
                 QMessageBox.information(self, "Success", f"Experiment exported to {filepath}")
             except Exception as e:
@@ -300,8 +300,6 @@ class ExperimentEditor(QDialog):
         if not self.current_experiment:
             return
 
-        from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QComboBox, QLineEdit
-
         dialog = QDialog(self)
         dialog.setWindowTitle("Add Trial")
         dialog.setModal(True)
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 
-import json
 import threading
-import time
 import websocket
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Dict, Any
 from PyQt6.QtCore import QObject, pyqtSignal
+from shared.managers import CommunicationMessageBuilder, CommunicationMessageParser
+
+CONNECT_TIMEOUT = 10  # Seconds
 
 
 class DeviceConnectionManager(QObject):
@@ -27,12 +28,16 @@ class DeviceConnectionManager(QObject):
         self.is_connected = False
         self.device_version = "unknown"
 
+        # Set when a connection attempt opens or fails, so connect() waits without polling
+        self._connect_attempt_done = threading.Event()
+
     def connect(self):
         """Establish WebSocket connection to the device"""
         if self.is_connected:
             return
 
         try:
+            self._connect_attempt_done.clear()
             self.ws = websocket.WebSocketApp(
                 self.ws_url,
                 on_message=self._on_message,
@@ -44,15 +49,15 @@ class DeviceConnectionManager(QObject):
             self.ws_thread = threading.Thread(target=self._run_websocket, daemon=True)
             self.ws_thread.start()
 
-            # Wait for connection (max 10 seconds)
-            for _ in range(20):
-                if self.ws.sock and self.ws.sock.connected:
-                    self.is_connected = True
-                    self.connected.emit()
-                    return
-                time.sleep(0.5)
+            # Wait for the connection to open or fail
+            if not self._connect_attempt_done.wait(timeout=CONNECT_TIMEOUT):
+                raise ConnectionError(f"Failed to connect to {self.device_name} within {CONNECT_TIMEOUT} seconds")
+            if self.ws.sock and self.ws.sock.connected:
+                self.is_connected = True
+                self.connected.emit()
+                return
 
-            raise ConnectionError(f"Failed to connect to {self.device_name} within 10 seconds")
+            raise ConnectionError(f"Failed to connect to {self.device_name}")
 
         except Exception as e:
             raise ConnectionError(f"Error connecting to {self.device_name}: {str(e)}")
@@ -70,7 +75,7 @@ class DeviceConnectionManager(QObject):
             raise ConnectionError(f"Not connected to {self.device_name}")
 
         try:
-            self.ws.send(json.dumps(message))
+            self.ws.send(CommunicationMessageBuilder.serialize(message))
         except Exception as e:
             raise ConnectionError(f"Failed to send message to {self.device_name}: {str(e)}")
 
@@ -86,38 +91,41 @@ class DeviceConnectionManager(QObject):
 
     def _run_websocket(self):
         """Run the WebSocket in a separate thread"""
-        self.ws.run_forever()
+        try:
+            self.ws.run_forever()
+        finally:
+            self._connect_attempt_done.set()
 
     def _on_open(self, ws):
         """Handle WebSocket opening"""
         self.is_connected = True
         self.connected.emit()
+        self._connect_attempt_done.set()
 
     def _on_message(self, ws, message: str):
         """Handle incoming WebSocket messages"""
-        try:
-            parsed_message = json.loads(message)
-
-            # Extract version info if present
-            if isinstance(parsed_message, dict) and "version" in parsed_message:
-                new_version = parsed_message["version"]
-                if new_version != self.device_version:
-                    self.device_version = new_version
+        parsed_message = CommunicationMessageParser.parse_message(message)
+        if parsed_message is None:
+            return  # Ignore invalid JSON
 
-            # Emit signal with the parsed message
-            self.message_received.emit(parsed_message)
+        # Extract version info if present
+        if isinstance(parsed_message, dict) and "version" in parsed_message:
+            new_version = parsed_message["version"]
+            if new_version != self.device_version:
+                self.device_version = new_version
 
-        except json.JSONDecodeError:
-            pass  # Ignore invalid JSON
+        # Emit signal with the parsed message
+        self.message_received.emit(parsed_message)
 
     def _on_error(self, ws, error):
         """Handle WebSocket errors"""
         print(f"WebSocket error for {self.device_name}: {error}")
         self.is_connected = False
         self.disconnected.emit()
+        self._connect_attempt_done.set()
 
     def _on_close(self, ws, close_status_code, close_msg):
         """Handle WebSocket closing"""
         self.is_connected = False
         self.disconnected.emit()
-
+        self._connect_attempt_done.set()
@@ -8,13 +8,13 @@ License: MIT
 """
 
 import pygame
-import json
-import time
 import threading
 import asyncio
 import websockets
 import queue
 import subprocess
+from collections import deque
+from functools import partial
 
 from shared.constants import *
 from shared.models import Config
@@ -24,9 +24,10 @@ from shared import VERSION
 from device.hardware.GPIOController import GPIOController
 from device.hardware.DisplayController import DisplayController
 from device.hardware.DataController import DataController
+from device.hardware.constants import DEFAULT_GPIO_STATE
 from device.core.ExperimentProcessor import ExperimentProcessor
-from device.utils.logger import log, set_message_queue
-from device.utils.helpers import Randomness
+from device.utils.logger import log, set_message_queue, set_debug, is_enabled_for
+from device.utils.helpers import Randomness, get_sysfont
 
 # Global device and message queue
 _device = None
@@ -35,6 +36,36 @@ _device_message_queue = None
 # Constants
 HOST = DEFAULT_HOST
 PORT = DEFAULT_PORT
+HANDLED_EVENT_TYPES = [pygame.QUIT, pygame.KEYDOWN]
+SIMULATION_EVENT_TYPES = HANDLED_EVENT_TYPES + [pygame.KEYUP]  # Key releases clear simulated inputs
+# Inputs counted in the statistics on each rising edge
+INPUT_STATISTICS = (
+  ("input_ir", "nose_pokes"),
+  ("input_lever_left", "left_lever_presses"),
+  ("input_lever_right", "right_lever_presses"),
+  ("input_port", "water_deliveries"),
+)
+# Inputs the input tests wait on, signalled on each rising edge
+TESTED_INPUTS = ("input_lever_left", "input_lever_right", "input_ir")
+# Levers checked in order by the lever test, with their log labels
+LEVER_TESTS = (
+  ("input_lever_left", "Left lever"),
+  ("input_lever_right", "Right lever"),
+)
+# Tests taking an optional duration, with their labels for invalid duration errors
+TIMED_TEST_LABELS = {
+  "test_water_delivery": "water delivery",
+  "test_led_port": "nose port LED",
+  "test_led_levers": "lever LEDs",
+  "test_displays": "display",
+}
+UNTIMED_TESTS = ("test_input_levers", "test_input_ir")
+FRAME_RATE = 60  # Frames per second for the update and render loop
+WAITING_BANNER_HEIGHT = 32  # Height of the simulation banner on the waiting screen
+LOCAL_IP_REFRESH_MS = 5000  # Milliseconds between local IP lookups for the waiting screen
+# Interval between control panel sends, doubled up to the maximum while idle
+SEND_INTERVAL = 0.05
+MAX_SEND_INTERVAL = 0.4
 
 class Device:
   def __init__(self, port=DEFAULT_PORT):
@@ -52,24 +83,12 @@ class Device:
     self.test_state_manager = TestStateManager()
 
     # Input states
-    self._input_states = {
-      "input_lever_left": False,
-      "input_lever_right": False,
-      "input_ir": False,
-      "input_port": False,
-      "led_port": False,
-      "led_lever_left": False,
-      "led_lever_right": False
-    }
-    self._previous_input_states = {
-      "input_lever_left": False,
-      "input_lever_right": False,
-      "input_ir": False,
-      "input_port": False,
-      "led_port": False,
-      "led_lever_left": False,
-      "led_lever_right": False
-    }
+    self._input_states = DEFAULT_GPIO_STATE.copy()
+    self._previous_input_states = DEFAULT_GPIO_STATE.copy()
+
+    # Set by the device loop on each rising edge of a tested input, so input
+    # tests can block on an event instead of polling the GPIO
+    self._input_events = {input_name: threading.Event() for input_name in TESTED_INPUTS}
 
     # Initialize pygame
     pygame.init()
@@ -91,11 +110,40 @@ class Device:
       display_flags
     )
     self.screen.fill((0, 0, 0))
-    self.font = pygame.font.SysFont("Arial", 64)
+    self.font = get_sysfont("Arial", 64)
+
+    # Screen and controllers shared by every trial the device creates
+    self.trial_resources = {
+      "screen": self.screen,
+      "font": self.font,
+      "width": self.width,
+      "height": self.height,
+      "gpio": self.gpio,
+      "display": self.display,
+      "statistics": self.statistics_controller,
+    }
+
+    # Simulated inputs and lights, set on key press and cleared on key release
+    self._simulated_key_handlers = {
+      pygame.K_1: self.gpio.simulate_input_lever_left, # Left lever
+      pygame.K_2: self.gpio.simulate_input_lever_right, # Right lever
+      pygame.K_3: self.gpio.simulate_input_ir, # Nose poke
+      pygame.K_SPACE: self.gpio.simulate_input_ir, # Nose poke (existing)
+      pygame.K_j: self.gpio.simulate_led_lever_left, # Left lever light
+      pygame.K_k: self.gpio.simulate_led_port, # Nose light
+      pygame.K_l: self.gpio.simulate_led_lever_right, # Right lever light
+    }
+
+    # Only queue the event types the device and trials handle, mouse and
+    # window events would otherwise fill the queue and be iterated every frame.
+    # Key releases are only needed to drive simulated inputs.
+    self._event_types = SIMULATION_EVENT_TYPES if is_simulation else HANDLED_EVENT_TYPES
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(self._event_types)
 
     # Trial management
     self._current_trial = None
-    self._trials = []
+    self._trials = deque()
     self._trial_configs = []
     self._should_loop = False
 
@@ -107,6 +155,15 @@ class Device:
     # Connection state
     self._control_panel_connected = False
 
+    # Waiting screen positions, fixed for the screen size
+    self._center_x = self.width // 2
+    self._waiting_center_y = self.height // 2
+    self._waiting_banner_center_y = (self.height - WAITING_BANNER_HEIGHT) // 2 + WAITING_BANNER_HEIGHT
+
+    # Local IP shown on the waiting screen and when it was last looked up
+    self._local_ip = None
+    self._local_ip_time = 0
+
   def _get_local_ip(self):
     """Get the local IP address of the device for LAN connections"""
     try:
@@ -135,6 +192,14 @@ class Device:
 
     return "127.0.0.1"
 
+  def _get_waiting_screen_ip(self):
+    """Get the local IP address, looking it up again at most every LOCAL_IP_REFRESH_MS"""
+    now = pygame.time.get_ticks()
+    if self._local_ip is None or now - self._local_ip_time >= LOCAL_IP_REFRESH_MS:
+      self._local_ip = self._get_local_ip()
+      self._local_ip_time = now
+    return self._local_ip
+
   def _render_waiting_screen(self):
     """Render the waiting screen with timeline upload message"""
     self.screen.fill((0, 0, 0))
@@ -147,51 +212,49 @@ class Device:
       simulated_components.append("Displays")
 
     # Draw orange warning banner if any components are simulated
-    banner_height = 32
+    banner_height = WAITING_BANNER_HEIGHT
     if simulated_components:
       # Orange banner background
       banner_rect = pygame.Rect(0, 0, self.width, banner_height)
       pygame.draw.rect(self.screen, (255, 165, 0), banner_rect)  # Orange color
 
       # Warning text
-      warning_font = pygame.font.SysFont("Arial", 18)
+      warning_font = get_sysfont("Arial", 18)
       warning_text = f"Simulating: {', '.join(simulated_components)}"
       warning_surface = warning_font.render(warning_text, True, (0, 0, 0))  # Black text
-      warning_rect = warning_surface.get_rect(center=(self.width // 2, banner_height // 2))
+      warning_rect = warning_surface.get_rect(center=(self._center_x, banner_height // 2))
       self.screen.blit(warning_surface, warning_rect)
 
     # Status text in center (adjusted for banner)
-    main_font = pygame.font.SysFont("Arial", 48)
+    main_font = get_sysfont("Arial", 48)
     if self._control_panel_connected:
       main_text = main_font.render("Ready", True, (255, 255, 255))
     else:
       main_text = main_font.render("Waiting for connection...", True, (255, 255, 255))
 
     # Adjust center position if banner is present
-    center_y = self.height // 2
-    if simulated_components:
-      center_y = (self.height - banner_height) // 2 + banner_height
+    center_y = self._waiting_banner_center_y if simulated_components else self._waiting_center_y
 
-    main_rect = main_text.get_rect(center=(self.width // 2, center_y))
+    main_rect = main_text.get_rect(center=(self._center_x, center_y))
     self.screen.blit(main_text, main_rect)
 
     # IP address and port beneath main text
-    ip_address = self._get_local_ip()
-    ip_font = pygame.font.SysFont("Arial", 32)
+    ip_address = self._get_waiting_screen_ip()
+    ip_font = get_sysfont("Arial", 32)
     ip_text_str = f"{ip_address}:{self.port}"
     ip_text = ip_font.render(ip_text_str, True, (255, 255, 255))
-    ip_rect = ip_text.get_rect(center=(self.width // 2, center_y + 60))
+    ip_rect = ip_text.get_rect(center=(self._center_x, center_y + 60))
     self.screen.blit(ip_text, ip_rect)
 
     # Version at bottom of screen
-    version_font = pygame.font.SysFont("Arial", 20)
+    version_font = get_sysfont("Arial", 20)
     version_text = version_font.render(f"Version: {self.version}", True, (255, 255, 255))
-    version_rect = version_text.get_rect(center=(self.width // 2, self.height - 30))
+    version_rect = version_text.get_rect(center=(self._center_x, self.height - 30))
     self.screen.blit(version_text, version_rect)
 
     # Simulation indicators in top left corner (if in simulation mode)
     if self.gpio.is_simulating_gpio():
-      sim_font = pygame.font.SysFont("Arial", 16)
+      sim_font = get_sysfont("Arial", 16)
       input_states = self.gpio.get_gpio_state()
       state_text = [
         f"Simulated GPIO state:",
@@ -225,54 +288,43 @@ class Device:
 
   def update(self):
     """Update device state and handle events"""
-    events = pygame.event.get()
+    events = pygame.event.get(self._event_types)
+
+    # Bind names used in the per-event loop to locals once per frame
+    QUIT, KEYDOWN, KEYUP, K_ESCAPE = pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.K_ESCAPE
+    is_simulating = self.gpio.is_simulating_gpio()
+    simulated_key_handlers = self._simulated_key_handlers
+
+    # Keys pressed this frame, trials only need the key codes
+    keys = []
 
     for event in events:
-      if event.type == pygame.QUIT:
+      event_type = event.type
+      if event_type == QUIT:
         self._running = False
         return False
-      elif event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
+      elif event_type == KEYDOWN:
+        keys.append(event.key)
+        if event.key == K_ESCAPE:
           self._running = False
           return False
-        elif self.gpio.is_simulating_gpio():
-          if event.key == pygame.K_1: # Left lever press
-            self.gpio.simulate_input_lever_left(True)
-          elif event.key == pygame.K_2: # Right lever press
-            self.gpio.simulate_input_lever_right(True)
-          elif event.key == pygame.K_3: # Nose poke entry
-            self.gpio.simulate_input_ir(True)
-          elif event.key == pygame.K_SPACE: # Nose poke entry (existing)
-            self.gpio.simulate_input_ir(True)
-          elif event.key == pygame.K_j: # Left lever light
-            self.gpio.simulate_led_lever_left(True)
-          elif event.key == pygame.K_k: # Nose light
-            self.gpio.simulate_led_port(True)
-          elif event.key == pygame.K_l: # Right lever light
-            self.gpio.simulate_led_lever_right(True)
-      elif event.type == pygame.KEYUP:
-        if self.gpio.is_simulating_gpio():
-          if event.key == pygame.K_1: # Left lever release
-            self.gpio.simulate_input_lever_left(False)
-          elif event.key == pygame.K_2: # Right lever release
-            self.gpio.simulate_input_lever_right(False)
-          elif event.key == pygame.K_3: # Nose poke exit
-            self.gpio.simulate_input_ir(False)
-          elif event.key == pygame.K_SPACE: # Nose poke exit (existing)
-            self.gpio.simulate_input_ir(False)
-          elif event.key == pygame.K_j: # Left lever light
-            self.gpio.simulate_led_lever_left(False)
-          elif event.key == pygame.K_k: # Nose light
-            self.gpio.simulate_led_port(False)
-          elif event.key == pygame.K_l: # Right lever light
-            self.gpio.simulate_led_lever_right(False)
+        elif is_simulating:
+          handler = simulated_key_handlers.get(event.key)
+          if handler:
+            handler(True)
+      elif event_type == KEYUP:
+        if is_simulating:
+          handler = simulated_key_handlers.get(event.key)
+          if handler:
+            handler(False)
 
     self._update_input_states_and_statistics()
 
     if not self._experiment_started:
       self._render_waiting_screen()
     elif self._current_trial:
-      if not self._current_trial.update(events):
+      self._current_trial.set_frame_time(pygame.time.get_ticks())
+      if not self._current_trial.update(keys):
         self._current_trial.on_exit()
 
         # Save trial data
@@ -284,34 +336,28 @@ class Device:
         # Send message about trial completion
         _device_message_queue.put(CommunicationMessageBuilder.trial_complete(self._current_trial.title, trial_data))
 
-        if len(self._trials) > 0:
-          self._current_trial = self._trials.pop(0)
+        if self._trials:
+          self._current_trial = self._trials.popleft()
           self._current_trial.on_enter()
-          _device_message_queue.put(CommunicationMessageBuilder.trial_start(self._current_trial.title))
+          _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.trial_start, self._current_trial.title))
         else:
           if self._should_loop:
             # Reset trials for next loop by creating new trial instances
-            self._trials = []
+            self._trials = deque()
             for config in self._trial_configs:
               trial = self.experiment_processor.trial_factory.create_trial(
                 config["type"],
                 config["kwargs"],
-                screen=self.screen,
-                font=self.font,
-                width=self.width,
-                height=self.height,
-                gpio=self.gpio,
-                display=self.display,
-                statistics=self.statistics_controller,
-                config=self.config
+                config=self.config,
+                **self.trial_resources
               )
               self._trials.append(trial)
 
-            self._current_trial = self._trials.pop(0)
+            self._current_trial = self._trials.popleft()
             self._current_trial.on_enter()
 
             log("Timeline loop completed, starting next iteration", "info")
-            _device_message_queue.put(CommunicationMessageBuilder.trial_start(self._current_trial.title))
+            _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.trial_start, self._current_trial.title))
           else:
             if self._data:
               # Save final statistics
@@ -324,33 +370,52 @@ class Device:
             self._experiment_started = False
             self._current_trial = None
             self._trial_configs = []
-            self._trials = []
+            self._trials = deque()
             self._should_loop = False
             log("Experiment completed, timeline cleared, returning to waiting state", "info")
-            _device_message_queue.put(CommunicationMessageBuilder.experiment_status("completed"))
+            _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.experiment_status, "completed"))
 
       if self._current_trial:
         self._current_trial.render()
         pygame.display.flip()
 
+    # Write the outputs set during this frame
+    self.gpio.flush_outputs()
+
     return True
 
   def _update_input_states_and_statistics(self):
     """Update input states and track statistics based on changes"""
     current_input_states = self.gpio.get_gpio_state()
+    previous_input_states = self._previous_input_states
+
+    # Only state transitions are logged and counted
+    if current_input_states == previous_input_states:
+      return
+
+    if is_enabled_for("debug"):
+      log("Input states: %s", "debug", current_input_states)
+
+    # Copy since the GPIO state is updated in place, the snapshot is then only
+    # replaced, never modified, so other threads and tasks can read it freely.
+    # Published before waking waiters so they observe the new state
     self._input_states = current_input_states.copy()
+    self._previous_input_states = self._input_states
+
+    # Wake any input test waiting on a rising edge
+    for input_name, input_event in self._input_events.items():
+      if current_input_states[input_name] and not previous_input_states[input_name]:
+        input_event.set()
 
     if self._experiment_started:
-      # Check for changes and update statistics
-      if not self._previous_input_states["input_ir"] and current_input_states["input_ir"]:
-        self.statistics_controller.increment_stat("nose_pokes")
-      if not self._previous_input_states["input_lever_left"] and current_input_states["input_lever_left"]:
-        self.statistics_controller.increment_stat("left_lever_presses")
-      if not self._previous_input_states["input_lever_right"] and current_input_states["input_lever_right"]:
-        self.statistics_controller.increment_stat("right_lever_presses")
-      if not self._previous_input_states["input_port"] and current_input_states["input_port"]:
-        self.statistics_controller.increment_stat("water_deliveries")
-    self._previous_input_states = current_input_states.copy()
+      # Count rising edges of the tracked inputs
+      for input_name, statistic in INPUT_STATISTICS:
+        if current_input_states[input_name] and not previous_input_states[input_name]:
+          self.statistics_controller.increment_stat(statistic)
+
+  def get_input_states(self):
+    """Get the GPIO state snapshot from the last change seen by the device loop"""
+    return self._input_states
 
   def get_statistics(self):
     """Get current statistics"""
@@ -382,16 +447,16 @@ class Device:
         self._data.add_experiment_file(experiment_file)
 
     # Set trials from timeline
-    self._trials = trials.copy() # Store original trials\
+    self._trials = deque(trials) # Store original trials, consumed in order with popleft()
     self._trial_configs = trial_configs.copy() # Store trial configs, reused for looped experiments
     self._should_loop = loop  # Set loop flag
 
-    self._current_trial = self._trials.pop(0)
+    self._current_trial = self._trials.popleft()
     self._current_trial.on_enter()
     self._experiment_started = True
 
-    _device_message_queue.put(CommunicationMessageBuilder.trial_start(self._current_trial.title))
-    _device_message_queue.put(CommunicationMessageBuilder.experiment_status("started", self._current_trial.title))
+    _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.trial_start, self._current_trial.title))
+    _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.experiment_status, "started", self._current_trial.title))
     log("Timeline experiment started", "info")
 
   def stop_experiment(self):
@@ -407,7 +472,7 @@ class Device:
     # Stop the current experiment
     self._experiment_started = False
     self._current_trial = None
-    self._trials = []
+    self._trials = deque()
 
     if self._data:
       self._data.add_statistics(self.get_statistics())
@@ -416,83 +481,87 @@ class Device:
       else:
         log("Data saved", "success")
 
-    _device_message_queue.put(CommunicationMessageBuilder.experiment_status("stopped"))
+    _device_message_queue.put(CommunicationMessageBuilder.serialize_cached(CommunicationMessageBuilder.experiment_status, "stopped"))
     log("Experiment stopped", "info")
 
+  def _fail_test(self, test_name, message):
+    """
+    Mark a test as failed, send the test states and log the failure
+    Args:
+      test_name: Name of the test in the test state manager
+      message: Error message to log
+    """
+    self.test_state_manager.set_test_state(test_name, TEST_STATES["FAILED"])
+    _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
+    log(message, "error")
+
+  def _pass_test(self, test_name, message):
+    """
+    Mark a test as passed, send the test states and log the success, only if
+    the test is still running so a test reset while running does not pass
+    Args:
+      test_name: Name of the test in the test state manager
+      message: Success message to log
+    """
+    if self.test_state_manager.get_test_state(test_name) == TEST_STATES["RUNNING"]:
+      self.test_state_manager.set_test_state(test_name, TEST_STATES["PASSED"])
+      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
+      log(message, "success")
+
   async def _test_water_delivery(self, duration_ms=2000):
     try:
       self.gpio.set_input_port(True)
+      self.gpio.flush_outputs()
       await asyncio.sleep(duration_ms / 1000)  # Convert milliseconds to seconds
       self.gpio.set_input_port(False)
+      self.gpio.flush_outputs()
     except Exception as e:
-      self.test_state_manager.set_test_state("test_water_delivery", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Could not activate water delivery: {str(e)}", "error")
-
-    if self.test_state_manager.get_test_state("test_water_delivery") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_water_delivery", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Test water delivery passed (duration: {duration_ms}ms)", "success")
+      self._fail_test("test_water_delivery", f"Could not activate water delivery: {str(e)}")
+    else:
+      self._pass_test("test_water_delivery", f"Test water delivery passed (duration: {duration_ms}ms)")
 
   def test_water_delivery(self, duration_ms=2000):
     log(f"Testing water delivery for {duration_ms}ms", "start")
     self.test_state_manager.set_test_state("test_water_delivery", TEST_STATES["RUNNING"])
     asyncio.create_task(self._test_water_delivery(duration_ms))
 
-  def _test_input_levers(self):
-    # Step 2: Test that the left lever can be moved to 1.0
-    log("Testing left lever", "start")
-    log("Waiting for left lever input...", "info")
-    running_input_test = True
-    running_input_test_start_time = time.time()
-    while running_input_test:
-      input_state = self.gpio.get_gpio_state()
-      if input_state["input_lever_left"] == True:
-        running_input_test = False
-
-      # Ensure test doesn't run indefinitely
-      if time.time() - running_input_test_start_time > INPUT_TEST_TIMEOUT:
-        self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-        _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-        log("Left lever input timed out", "error")
-        return
-
-    if input_state["input_lever_left"] != True:
-      self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("Left lever did not move to 1.0", "error")
-      return
+  def _wait_for_input(self, input_name):
+    """
+    Wait for an input to become active, returning False if it does not within INPUT_TEST_TIMEOUT
+    Args:
+      input_name: Name of the input in TESTED_INPUTS
+    """
+    input_event = self._input_events[input_name]
+    input_event.clear()
+    if self._input_states[input_name]:
+      return True
+    return input_event.wait(timeout=INPUT_TEST_TIMEOUT)
+
+  def _run_lever_test(self, input_name, label):
+    """
+    Wait for a lever to be pressed, failing the lever test if it times out
+    Args:
+      input_name: Name of the lever input
+      label: Lever name used in the log messages
+    Returns:
+      bool: True if the lever was pressed
+    """
+    log(f"Testing {label.lower()}", "start")
+    log(f"Waiting for {label.lower()} input...", "info")
+    if not self._wait_for_input(input_name):
+      self._fail_test("test_input_levers", f"{label} input timed out")
+      return False
+
+    log(f"{label} test passed", "success")
+    return True
 
-    log("Left lever test passed", "success")
-
-    # Step 3: Test that the right lever can be moved to 1.0
-    running_input_test = True
-    running_input_test_start_time = time.time()
-    log("Testing right lever", "start")
-    log("Waiting for right lever input...", "info")
-    while running_input_test:
-      input_state = self.gpio.get_gpio_state()
-      if input_state["input_lever_right"] == True:
-        running_input_test = False
-
-      # Ensure test doesn't run indefinitely
-      if time.time() - running_input_test_start_time > INPUT_TEST_TIMEOUT:
-        self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-        _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-        log("Right lever input timed out", "error")
+  def _test_input_levers(self):
+    # Step 2: Test that each lever can be moved to 1.0
+    for input_name, label in LEVER_TESTS:
+      if not self._run_lever_test(input_name, label):
         return
 
-    if input_state["input_lever_right"] != True:
-      self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("Right lever did not move to 1.0", "error")
-      return
-
-    log("Right lever test passed", "success")
-    if self.test_state_manager.get_test_state("test_input_levers") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("Levers test passed", "success")
+    self._pass_test("test_input_levers", "Levers test passed")
 
   def test_input_levers(self):
     log("Testing input levers", "start")
@@ -501,75 +570,48 @@ class Device:
     # Step 1: Test that both levers default to 0.0
     input_state = self.gpio.get_gpio_state()
     if input_state["input_lever_left"] != False:
-      self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("Left lever did not default to 0.0", "error")
+      self._fail_test("test_input_levers", "Left lever did not default to 0.0")
       return
 
     if input_state["input_lever_right"] != False:
-      self.test_state_manager.set_test_state("test_input_levers", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("Right lever did not default to 0.0", "error")
+      self._fail_test("test_input_levers", "Right lever did not default to 0.0")
       return
 
     log("Levers defaulted to 0.0", "success")
 
     # Run the test in a separate thread
-    lever_test_thread = threading.Thread(target=self._test_input_levers)
+    lever_test_thread = threading.Thread(target=self._test_input_levers, daemon=True)
     lever_test_thread.start()
 
   def _test_input_ir(self):
     # Step 1: Test that the IR is broken
     log("Waiting for IR input...", "info")
-    running_input_test = True
-    running_input_test_start_time = time.time()
-    while running_input_test:
-      input_state = self.gpio.get_gpio_state()
-      if input_state["input_ir"] == True:
-        running_input_test = False
-
-      # Ensure test doesn't run indefinitely
-      if time.time() - running_input_test_start_time > INPUT_TEST_TIMEOUT:
-        self.test_state_manager.set_test_state("test_input_ir", TEST_STATES["FAILED"])
-        _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-        log("Timed out while waiting for IR input", "error")
-        return
-
-    if input_state["input_ir"] != True:
-      self.test_state_manager.set_test_state("test_input_ir", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("No IR input detected", "error")
+    if not self._wait_for_input("input_ir"):
+      self._fail_test("test_input_ir", "Timed out while waiting for IR input")
       return
 
-    # Set test to passed
-    if self.test_state_manager.get_test_state("test_input_ir") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_input_ir", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log("IR test passed", "success")
+    self._pass_test("test_input_ir", "IR test passed")
 
   def test_input_ir(self):
     log("Testing IR", "start")
     self.test_state_manager.set_test_state("test_input_ir", TEST_STATES["RUNNING"])
 
     # Run the test in a separate thread
-    input_ir_test_thread = threading.Thread(target=self._test_input_ir)
+    input_ir_test_thread = threading.Thread(target=self._test_input_ir, daemon=True)
     input_ir_test_thread.start()
 
   async def _test_led_port(self, duration_ms=2000):
     try:
       # Turn on the nose light
       self.gpio.set_led_port(True)
+      self.gpio.flush_outputs()
       await asyncio.sleep(duration_ms / 1000)  # Convert milliseconds to seconds
       self.gpio.set_led_port(False)
+      self.gpio.flush_outputs()
     except Exception as e:
-      self.test_state_manager.set_test_state("test_led_port", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Could not control nose port LED: {str(e)}", "error")
-
-    if self.test_state_manager.get_test_state("test_led_port") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_led_port", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Nose port LED test passed (duration: {duration_ms}ms)", "success")
+      self._fail_test("test_led_port", f"Could not control nose port LED: {str(e)}")
+    else:
+      self._pass_test("test_led_port", f"Nose port LED test passed (duration: {duration_ms}ms)")
 
   def test_led_port(self, duration_ms=2000):
     log(f"Testing nose port LED for {duration_ms}ms", "start")
@@ -581,18 +623,15 @@ class Device:
       # Turn on the lever lights
       self.gpio.set_led_lever_left(True)
       self.gpio.set_led_lever_right(True)
+      self.gpio.flush_outputs()
       await asyncio.sleep(duration_ms / 1000)  # Convert milliseconds to seconds
       self.gpio.set_led_lever_left(False)
       self.gpio.set_led_lever_right(False)
+      self.gpio.flush_outputs()
     except Exception as e:
-      self.test_state_manager.set_test_state("test_led_levers", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Could not control lever LEDs: {str(e)}", "error")
-
-    if self.test_state_manager.get_test_state("test_led_levers") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_led_levers", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Lever LEDs test passed (duration: {duration_ms}ms)", "success")
+      self._fail_test("test_led_levers", f"Could not control lever LEDs: {str(e)}")
+    else:
+      self._pass_test("test_led_levers", f"Lever LEDs test passed (duration: {duration_ms}ms)")
 
   def test_led_levers(self, duration_ms=2000):
     log(f"Testing lever LEDs for {duration_ms}ms", "start")
@@ -606,14 +645,9 @@ class Device:
       await asyncio.sleep(duration_ms / 1000)  # Convert milliseconds to seconds
       self.display.clear_displays()
     except Exception as e:
-      self.test_state_manager.set_test_state("test_displays", TEST_STATES["FAILED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Could not control displays: {str(e)}", "error")
-
-    if self.test_state_manager.get_test_state("test_displays") == TEST_STATES["RUNNING"]:
-      self.test_state_manager.set_test_state("test_displays", TEST_STATES["PASSED"])
-      _device_message_queue.put(CommunicationMessageBuilder.test_state(self.test_state_manager.get_all_test_states()))
-      log(f"Display test passed (duration: {duration_ms}ms)", "success")
+      self._fail_test("test_displays", f"Could not control displays: {str(e)}")
+    else:
+      self._pass_test("test_displays", f"Display test passed (duration: {duration_ms}ms)")
 
   def test_displays(self, duration_ms=2000):
     log(f"Testing displays for {duration_ms}ms", "start")
@@ -621,62 +655,25 @@ class Device:
     asyncio.create_task(self._test_displays(duration_ms))
 
   def run_test(self, command):
-    if command == "test_water_delivery":
-      self.test_water_delivery()
-    elif command.startswith("test_water_delivery"):
-      # Parse duration from command: "test_water_delivery <duration_ms>"
-      parts = command.split(" ")
-      if len(parts) > 1:
-        try:
-          duration_ms = int(parts[1])
-          self.test_water_delivery(duration_ms)
-        except ValueError:
-          log(f"Invalid duration for water delivery test: {parts[1]}", "error")
-      else:
-        self.test_water_delivery()
-    elif command == "test_input_levers":
-      self.test_input_levers()
-    elif command == "test_input_ir":
-      self.test_input_ir()
-    elif command == "test_led_port":
-      self.test_led_port()
-    elif command.startswith("test_led_port"):
-      # Parse duration from command: "test_led_port <duration_ms>"
-      parts = command.split(" ")
-      if len(parts) > 1:
-        try:
-          duration_ms = int(parts[1])
-          self.test_led_port(duration_ms)
-        except ValueError:
-          log(f"Invalid duration for nose port LED test: {parts[1]}", "error")
-      else:
-        self.test_led_port()
-    elif command == "test_lever_lights":
-      self.test_led_levers()
-    elif command.startswith("test_led_levers"):
-      # Parse duration from command: "test_led_levers <duration_ms>"
-      parts = command.split(" ")
-      if len(parts) > 1:
-        try:
-          duration_ms = int(parts[1])
-          self.test_led_levers(duration_ms)
-        except ValueError:
-          log(f"Invalid duration for lever LEDs test: {parts[1]}", "error")
-      else:
-        self.test_led_levers()
-    elif command == "test_displays":
-      self.test_displays()
-    elif command.startswith("test_displays"):
-      # Parse duration from command: "test_displays <duration_ms>"
-      parts = command.split(" ")
-      if len(parts) > 1:
-        try:
-          duration_ms = int(parts[1])
-          self.test_displays(duration_ms)
-        except ValueError:
-          log(f"Invalid duration for display test: {parts[1]}", "error")
-      else:
-        self.test_displays()
+    """
+    Run a test command, timed tests taking an optional duration in milliseconds
+    Args:
+      command: Test command, e.g. "test_input_ir" or "test_led_port 2000"
+    """
+    # Test methods are named after their commands
+    test_name, *parameters = command.split()
+    if test_name in TIMED_TEST_LABELS:
+      if not parameters:
+        getattr(self, test_name)()
+        return
+      try:
+        duration_ms = int(parameters[0])
+      except ValueError:
+        log(f"Invalid duration for {TIMED_TEST_LABELS[test_name]} test: {parameters[0]}", "error")
+        return
+      getattr(self, test_name)(duration_ms)
+    elif command in UNTIMED_TESTS:
+      getattr(self, command)()
 
   def cleanup(self):
     """Clean up resources before shutdown"""
@@ -690,33 +687,46 @@ class Device:
     self.test_state_manager.reset_test_states()
     log("Test states reset to NOT_TESTED", "info")
 
-async def send_queued_messages(websocket):
+async def send_messages(websocket):
   """
-  Sends messages from the message queue to the control panel.
+  Sends queued messages and the current state of the device to the control
+  panel from a single loop. Each tick drains the message queue, then reads
+  only the latest input state snapshot and statistics, and sends them only if
+  they changed since the last send, so intermediate states are dropped. The
+  interval backs off while there is nothing to send and resets on activity.
   """
+  last_input_states = None
+  last_statistics = None
+  interval = SEND_INTERVAL
   while True:
     try:
-      # Check if there are messages in the queue
+      sent = False
+
+      # Send the messages queued by the device since the last tick, some of
+      # which are queued already serialized
       while not _device_message_queue.empty():
         message_data = _device_message_queue.get()
-        await websocket.send(json.dumps(message_data))
-      await asyncio.sleep(0.05)
-    except websockets.exceptions.ConnectionClosed:
-      log("Control panel connection closed", "warning")
-      break
-
-async def send_state_message(websocket):
-  """
-  Sends the current state of the device to the control panel.
-  """
-  while True:
-    try:
-      state_data = CommunicationMessageBuilder.input_state(_device.gpio.get_gpio_state(), _device.version)
-      await websocket.send(json.dumps(state_data))
+        if not isinstance(message_data, str):
+          message_data = CommunicationMessageBuilder.serialize(message_data)
+        await websocket.send(message_data)
+        sent = True
+
+      input_states = _device.get_input_states()
+      if input_states is not last_input_states:
+        state_data = CommunicationMessageBuilder.input_state(input_states, _device.version)
+        await websocket.send(CommunicationMessageBuilder.serialize(state_data))
+        last_input_states = input_states
+        sent = True
       if _device._experiment_started:
-        stats_data = CommunicationMessageBuilder.statistics(_device.get_statistics())
-        await websocket.send(json.dumps(stats_data))
-      await asyncio.sleep(0.05)
+        statistics = _device.get_statistics()
+        if statistics != last_statistics:
+          stats_data = CommunicationMessageBuilder.statistics(statistics)
+          await websocket.send(CommunicationMessageBuilder.serialize(stats_data))
+          last_statistics = statistics
+          sent = True
+
+      interval = SEND_INTERVAL if sent else min(interval * 2, MAX_SEND_INTERVAL)
+      await asyncio.sleep(interval)
     except websockets.exceptions.ConnectionClosed:
       log("Control panel connection closed", "warning")
       break
@@ -726,16 +736,17 @@ async def handle_connection(websocket, device: Device):
   try:
     device._control_panel_connected = True
 
-    message_sender_task = asyncio.create_task(send_queued_messages(websocket))
-    state_sender_task = asyncio.create_task(send_state_message(websocket))
+    message_sender_task = asyncio.create_task(send_messages(websocket))
 
     async for message in websocket:
       # Handle incoming messages
       try:
-        message_data = CommunicationMessageParser.parse_message(message)
-        if message_data and "type" in message_data:
-          await handle_json_message(websocket, device, message_data)
-          continue
+        # Only parse messages that look like JSON, commands are plain strings
+        if not CommunicationMessageParser.is_command_message(message):
+          message_data = CommunicationMessageParser.parse_message(message)
+          if message_data and "type" in message_data:
+            await handle_json_message(websocket, device, message_data)
+            continue
 
         command = message.strip()
         if CommunicationMessageParser.parse_test_command(command)[0] in TEST_COMMANDS:
@@ -751,9 +762,8 @@ async def handle_connection(websocket, device: Device):
         log(f"Error handling message: {str(e)}", "error")
 
     message_sender_task.cancel()
-    state_sender_task.cancel()
     try:
-      await asyncio.wait_for(asyncio.gather(message_sender_task, state_sender_task), timeout=1.0)
+      await asyncio.wait_for(message_sender_task, timeout=1.0)
     except (asyncio.CancelledError, asyncio.TimeoutError):
       pass
   except websockets.exceptions.ConnectionClosed:
@@ -771,7 +781,7 @@ async def handle_json_message(websocket, device: Device, message_data: dict):
     experiment_data = message_data.get("data", {})
     success, message = device.experiment_processor.process_experiment_upload(experiment_data)
     response = CommunicationMessageBuilder.experiment_validation(success, message)
-    await websocket.send(json.dumps(response))
+    await websocket.send(CommunicationMessageBuilder.serialize(response))
 
     if success:
       log(f"Experiment uploaded successfully: {message}", "success")
@@ -782,7 +792,7 @@ async def handle_json_message(websocket, device: Device, message_data: dict):
     animal_id = message_data.get("animal_id", "")
     if not animal_id:
       response = CommunicationMessageBuilder.experiment_error("Animal ID is required")
-      await websocket.send(json.dumps(response))
+      await websocket.send(CommunicationMessageBuilder.serialize(response))
       return
 
     success, message = device.experiment_processor.execute_experiment(animal_id)
@@ -790,7 +800,7 @@ async def handle_json_message(websocket, device: Device, message_data: dict):
       response = CommunicationMessageBuilder.experiment_validation(success, message)
     else:
       response = CommunicationMessageBuilder.experiment_error(message)
-    await websocket.send(json.dumps(response))
+    await websocket.send(CommunicationMessageBuilder.serialize(response))
 
     if success:
       log(f"Experiment started: {message}", "success")
@@ -820,7 +830,7 @@ async def handle_json_message(websocket, device: Device, message_data: dict):
       log(f"Data directory does not exist: {data_dir}", "warning")
 
     response = CommunicationMessageBuilder.data_file_list(data_files)
-    await websocket.send(json.dumps(response))
+    await websocket.send(CommunicationMessageBuilder.serialize(response))
     log(f"Sent list of {len(data_files)} data files", "info")
 
   elif message_type == "request_data_file":
@@ -845,7 +855,7 @@ async def handle_json_message(websocket, device: Device, message_data: dict):
           file_content,
           checksum
         )
-        await websocket.send(json.dumps(response))
+        await websocket.send(CommunicationMessageBuilder.serialize(response))
         log(f"Sent data file: {requested_filename}", "info")
       else:
         log(f"File not found or invalid: {requested_filename}", "error")
@@ -857,19 +867,33 @@ async def main_loop(device, port=DEFAULT_PORT):
   log("Starting main loop", "info")
   log(f"Server listening on port {port}", "info")
   server = await websockets.serve(
-    lambda ws: handle_connection(ws, device),
+    partial(handle_connection, device=device),
     HOST,
     port
   )
   device._websocket_server = server
 
+  # Hoist loop-invariant lookups out of the frame loop
+  update = device.update
+  sleep = asyncio.sleep
+  clock = asyncio.get_running_loop().time
+  frame_interval = 1 / FRAME_RATE
+
   try:
+    next_frame = clock()
     while device._running:
-      if not device.update():
+      if not update():
         log("Initiating shutdown...", "info")
         break
-      await asyncio.sleep(0)
-      await asyncio.sleep(1/60)
+
+      # Sleep until the next frame so events are pumped once per display frame
+      next_frame += frame_interval
+      delay = next_frame - clock()
+      if delay < 0:
+        # Frame overran, resynchronise instead of running frames back to back
+        next_frame = clock()
+        delay = 0
+      await sleep(delay)
   finally:
     # Emergency data save on shutdown
     if device._data:
@@ -909,9 +933,11 @@ async def main_loop(device, port=DEFAULT_PORT):
     device.cleanup()
     log("Main loop stopped", "info")
 
-def main(port=DEFAULT_PORT):
+def main(port=DEFAULT_PORT, debug=False):
   global _device, _device_message_queue
 
+  set_debug(debug)
+
   try:
     # Initialize the device
     _device = Device(port=port)
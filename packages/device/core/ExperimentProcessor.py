@@ -49,14 +49,8 @@ class ExperimentProcessor:
                 trials.append(self.trial_factory.create_trial(
                     trial_data.type,
                     trial_data.parameters,
-                    screen=self.device.screen,
-                    font=self.device.font,
-                    width=self.device.width,
-                    height=self.device.height,
-                    gpio=self.device.gpio,
-                    display=self.device.display,
-                    statistics=self.device.statistics_controller,
-                    config=self.current_experiment.config
+                    config=self.current_experiment.config,
+                    **self.device.trial_resources
                 ))
                 trial_configs.append({
                     "type": trial_data.type,
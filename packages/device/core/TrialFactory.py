@@ -8,42 +8,28 @@ License: MIT
 
 from typing import Dict, Any
 
+from device.core.Trials import Stage1, Stage2, Stage3, Stage4, Interval
+
 class TrialFactory:
     """Factory for creating trial objects from timeline data"""
 
     def __init__(self):
         self.trial_types = {
-            "Stage1": "Stage1",
-            "Stage2": "Stage2",
-            "Stage3": "Stage3",
-            "Stage4": "Stage4",
-            "Interval": "Interval"
+            "Stage1": Stage1,
+            "Stage2": Stage2,
+            "Stage3": Stage3,
+            "Stage4": Stage4,
+            "Interval": Interval
         }
 
     def create_trial(self, trial_type: str, parameters: Dict[str, Any], **kwargs):
         """Create a trial object from type and parameters"""
-        if trial_type not in self.trial_types:
+        trial_class = self.trial_types.get(trial_type)
+        if trial_class is None:
             raise ValueError(f"Unknown trial type: {trial_type}")
 
-        if trial_type == "Stage1":
-            from device.core.Trials import Stage1
-            return Stage1(**parameters, **kwargs)
-        elif trial_type == "Stage2":
-            from device.core.Trials import Stage2
-            return Stage2(**parameters, **kwargs)
-        elif trial_type == "Stage3":
-            from device.core.Trials import Stage3
-            return Stage3(**parameters, **kwargs)
-        elif trial_type == "Stage4":
-            from device.core.Trials import Stage4
-            return Stage4(**parameters, **kwargs)
-        elif trial_type == "Interval":
-            from device.core.Trials import Interval
-            return Interval(**parameters, **kwargs)
-        else:
-            raise ValueError(f"Unsupported trial type: {trial_type}")
+        return trial_class(**parameters, **kwargs)
 
     def is_valid_trial_type(self, trial_type: str) -> bool:
         """Check if a trial type is valid"""
         return trial_type in self.trial_types
-
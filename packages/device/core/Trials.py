@@ -7,20 +7,93 @@ License: MIT
 """
 
 import random
+import time
 import pygame
-from datetime import datetime
+from pygame.locals import K_ESCAPE, K_SPACE
+from array import array
+from datetime import datetime, timedelta
 from device.hardware.DisplayController import DisplayController
 from device.hardware.GPIOController import GPIOController
+from device.hardware.constants import DEFAULT_GPIO_STATE
 from device.utils.logger import log
-from device.utils.helpers import TrialOutcome
+from device.utils.helpers import TrialOutcome, get_sysfont
 from shared.constants import TRIAL_EVENTS
 from shared.managers import StatisticsManager
+from shared.models import Config
+
+# Lever input bits and the events and messages logged on their press and release edges
+LEVER_LEFT = 1
+LEVER_RIGHT = 2
+LEVER_EDGES = (
+  (LEVER_LEFT, TRIAL_EVENTS["LEFT_LEVER_PRESS"], TRIAL_EVENTS["LEFT_LEVER_RELEASE"], "Left lever pressed", "Left lever released"),
+  (LEVER_RIGHT, TRIAL_EVENTS["RIGHT_LEVER_PRESS"], TRIAL_EVENTS["RIGHT_LEVER_RELEASE"], "Right lever pressed", "Right lever released"),
+)
+
+# Trial milestone flags, each set once when the milestone is reached
+FLAG_NOSE_PORT_ENTRY = 1 << 0
+FLAG_NOSE_PORT_EXIT = 1 << 1
+FLAG_WATER_DELIVERED = 1 << 2
+FLAG_WATER_DELIVERY_COMPLETE = 1 << 3
+FLAG_REWARD_TRIGGERED = 1 << 4
+
+# Milestones that together end a successful trial
+STAGE1_COMPLETE = FLAG_NOSE_PORT_ENTRY | FLAG_WATER_DELIVERY_COMPLETE | FLAG_NOSE_PORT_EXIT
+STAGE2_COMPLETE = FLAG_REWARD_TRIGGERED | FLAG_WATER_DELIVERY_COMPLETE | FLAG_NOSE_PORT_EXIT
+WATER_COLLECTED = FLAG_WATER_DELIVERY_COMPLETE | FLAG_NOSE_PORT_EXIT
+
+# Inputs that block a trial from starting while active
+BLOCKING_INPUTS = ("input_lever_left", "input_lever_right", "input_ir")
+
+# Event type names by code, stored in the trial event log as small integer codes
+EVENT_TYPE_NAMES = list(TRIAL_EVENTS.values())
+EVENT_TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPE_NAMES)}
+
+def _get_event_type_code(event_type):
+  """Get the code for an event type, registering event types outside TRIAL_EVENTS on first use"""
+  code = EVENT_TYPE_CODES.get(event_type)
+  if code is None:
+    code = len(EVENT_TYPE_NAMES)
+    EVENT_TYPE_NAMES.append(event_type)
+    EVENT_TYPE_CODES[event_type] = code
+  return code
 
 class Trial:
   """
   Base interface for all experiment trials.
-  Each trial should implement update() and render() methods.
+  Each trial must implement the following methods, checked when the trial class is defined:
+    update(events): Update trial state based on events and time, where events is the
+      list of pygame key codes pressed this frame. Returns True if the trial should
+      continue, False if it should exit.
+    render(): Render the current trial state.
+  Intermediate base classes that leave these to their subclasses are declared with
+  abstract=True.
   """
+  __slots__ = (
+    "title", "screen", "width", "height", "font", "args", "kwargs",
+    "gpio", "display", "statistics", "data", "config", "simulation_font",
+    "trial_start", "trial_end", "_frame_time", "_simulating",
+    "_event_types", "_event_times_ns", "_event_details", "_start_wall", "_start_ns",
+    "_flags", "_lever_mask", "_lever_press_times", "_banner_surface", "_banner_rect",
+  )
+
+  # Default config shared by all trials created without an experiment config
+  _default_config = None
+
+  def __init_subclass__(cls, abstract=False, **kwargs):
+    """Check that concrete trial classes implement update() and render()"""
+    super().__init_subclass__(**kwargs)
+    if not abstract:
+      for method in ("update", "render"):
+        if not callable(getattr(cls, method, None)):
+          raise TypeError(f"{cls.__name__} must implement {method}()")
+
+  @classmethod
+  def _get_default_config(cls):
+    """Get the default config, created once on first use"""
+    if Trial._default_config is None:
+      Trial._default_config = Config()
+    return Trial._default_config
+
   def __init__(self, *args, **kwargs):
     self.title = "trial_default"
 
@@ -42,15 +115,40 @@ class Trial:
     # All trial data
     self.data = {}
 
+    # Tick count for the current frame, shared by update() and render()
+    self._frame_time = 0
+
+    # Trial event log, stored as parallel columns and assembled in get_events()
+    # Event types are codes into EVENT_TYPE_NAMES, and event times are monotonic
+    # nanoseconds, converted to wall-clock timestamps relative to the trial start
+    # when the events are assembled
+    self._event_types = array("H")
+    self._event_times_ns = array("q")
+    self._event_details = []
+    self._start_wall = datetime.now()
+    self._start_ns = time.perf_counter_ns()
+
+    # Milestones reached during the trial, as FLAG_* bits
+    self._flags = 0
+
+    # Lever bitmask from the previous update and press start times by lever bit
+    self._lever_mask = 0
+    self._lever_press_times = {}
+
     # Config from experiment (or default if not provided)
     self.config = kwargs.get('config')
     if self.config is None:
-        # Fallback to default config if not provided
-        from shared.models import Config
-        self.config = Config()
+        # Fallback to the shared default config if not provided
+        self.config = Trial._get_default_config()
+
+    # Simulation mode is fixed for the run, so check it once per trial
+    self._simulating = self.gpio.is_simulating_gpio()
+    if self._simulating:
+      self.simulation_font = get_sysfont("Arial", 16, bold=True)
 
-    if self.gpio.is_simulating_gpio():
-      self.simulation_font = pygame.font.SysFont("Arial", 16, bold=True)
+    # Simulation banner, rendered on first use since the title is set by subclasses
+    self._banner_surface = None
+    self._banner_rect = None
 
   def get_timestamp(self):
     """Get current timestamp in ISO format for consistent event timing"""
@@ -58,36 +156,40 @@ class Trial:
 
   def add_event(self, event_type: str, **kwargs):
     """Add a timestamped event to the trial's event log"""
-    event = {
-      "type": event_type,
-      "timestamp": self.get_timestamp(),
-      **kwargs
-    }
-    if not hasattr(self, 'events'):
-      self.events = []
-    self.events.append(event)
-
-  def update(self, events):
+    self._event_types.append(_get_event_type_code(event_type))
+    self._event_times_ns.append(time.perf_counter_ns())
+    self._event_details.append(kwargs or None)
+
+  def get_events(self):
+    """Get the trial's event log as a list of event dictionaries"""
+    events = []
+    start_wall = self._start_wall
+    start_ns = self._start_ns
+    event_type_names = EVENT_TYPE_NAMES
+    for code, time_ns, details in zip(self._event_types, self._event_times_ns, self._event_details):
+      timestamp = (start_wall + timedelta(microseconds=(time_ns - start_ns) // 1000)).isoformat()
+      event = {"type": event_type_names[code], "timestamp": timestamp}
+      if details:
+        event.update(details)
+      events.append(event)
+    return events
+
+  def set_frame_time(self, frame_time):
     """
-    Update trial state based on events and time
+    Set the tick count for the current frame
     Args:
-      events: List of pygame events to process
-    Returns:
-      bool: True if trial should continue, False if should exit
-    """
-    raise NotImplementedError("Trial must implement update()")
-
-  def render(self):
+      frame_time: Value of pygame.time.get_ticks() read once per frame
     """
-    Render the current trial state
-    """
-    raise NotImplementedError("Trial must implement render()")
+    self._frame_time = frame_time
 
   def on_enter(self):
     """
     Called when trial becomes active
     """
-    self.trial_start = self.get_timestamp()
+    self._frame_time = pygame.time.get_ticks()
+    self._start_wall = datetime.now()
+    self._start_ns = time.perf_counter_ns()
+    self.trial_start = self._start_wall.isoformat()
 
   def on_exit(self):
     """
@@ -98,6 +200,49 @@ class Trial:
     if self.title != "trial_iti" and hasattr(self, 'statistics') and self.statistics is not None:
       self.statistics.increment_trial_count()
 
+  def _render_simulation_banner(self):
+    """Draw the simulation mode banner, rendering its text only once"""
+    if self._banner_surface is None:
+      banner_text = f"[SIMULATION - {self.title}]"
+      self._banner_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
+      self._banner_rect = self._banner_surface.get_rect(center=(self.width // 2, 20))
+    self.screen.blit(self._banner_surface, self._banner_rect)
+
+  def _capture_lever_events(self, states, current_time, verbose=True, durations=False):
+    """
+    Log lever press and release events from the change in the lever bitmask
+    Args:
+      states: GPIO state read for this update
+      current_time: Tick count for this update
+      verbose: Log lever changes to the console
+      durations: Include the press duration in release events
+    Returns:
+      int: Current lever bitmask
+    """
+    mask = (LEVER_LEFT if states["input_lever_left"] else 0) | (LEVER_RIGHT if states["input_lever_right"] else 0)
+    changed = mask ^ self._lever_mask
+    if not changed:
+      return mask
+
+    for bit, press_event, release_event, press_message, release_message in LEVER_EDGES:
+      if not changed & bit:
+        continue
+      if mask & bit:
+        self._lever_press_times[bit] = current_time
+        if verbose:
+          log(press_message, "info")
+        self.add_event(press_event)
+      else:
+        if verbose:
+          log(release_message, "info")
+        if durations:
+          self.add_event(release_event, duration=current_time - self._lever_press_times[bit])
+        else:
+          self.add_event(release_event)
+
+    self._lever_mask = mask
+    return mask
+
   def add_data(self, key, value):
     """Add data to the trial's internal storage"""
     self.data[key] = value
@@ -114,15 +259,7 @@ class Trial:
     """Get current input states"""
     if self.gpio is None:
         # Default state if no updates received yet
-        return {
-          "input_lever_left": False,
-          "input_lever_right": False,
-          "input_ir": False,
-          "input_port": False,
-          "led_port": False,
-          "led_lever_left": False,
-          "led_lever_right": False
-        }
+        return DEFAULT_GPIO_STATE.copy()
     return self.gpio.get_gpio_state()
 
 class Interval(Trial):
@@ -130,10 +267,14 @@ class Interval(Trial):
   Stage ITI: Inter-trial interval
   Description: After each trial, the mouse is given an ITI of variable duration.
   """
+  __slots__ = ("start_time", "duration", "_deadline", "_screen_drawn")
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.title = "trial_iti"
     self.start_time = None
+    self._deadline = None
+    self._screen_drawn = False
 
     # Duration
     if "duration" in self.kwargs:
@@ -145,10 +286,14 @@ class Interval(Trial):
 
   def set_duration(self, duration):
     self.duration = duration
+    if self.start_time is not None:
+      self._deadline = self.start_time + duration
     log("ITI duration set to " + str(self.duration) + "ms", "success")
 
   def on_enter(self):
     self.start_time = pygame.time.get_ticks()
+    self._deadline = self.start_time + self.duration
+    self._screen_drawn = False
     super().on_enter()
 
     # Reset the IO outputs
@@ -159,37 +304,128 @@ class Interval(Trial):
     self.display.clear_displays()
 
   def update(self, events):
-    # Check if the ITI duration has passed
-    if pygame.time.get_ticks() - self.start_time > self.duration:
+    # Check if the ITI deadline has passed
+    if self._frame_time > self._deadline:
       self.add_data("trial_iti_completed", True)
       self.add_data("trial_outcome", TrialOutcome.SUCCESS)
       return False
 
-    # Handle any events
-    for event in events:
-      if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
-          return False
-        if event.key == pygame.K_SPACE:
-          self.add_data("trial_iti_canceled", True)
-          self.add_data("trial_outcome", TrialOutcome.CANCELLED)
-          return False
+    # Handle any key presses, most frames have none
+    if events:
+      if K_ESCAPE in events:
+        return False
+      if K_SPACE in events:
+        self.add_data("trial_iti_canceled", True)
+        self.add_data("trial_outcome", TrialOutcome.CANCELLED)
+        return False
 
     return True
 
   def render(self):
+    # The ITI screen is static, so it only needs drawing on the first frame
+    if self._screen_drawn:
+      return
+    self._screen_drawn = True
+
     # Clear screen
     self.screen.fill((0, 0, 0))
 
     # Add simulation mode banner if in simulation mode
-    if self.gpio.is_simulating_gpio() and self.simulation_font:
-      banner_text = f"[SIMULATION - {self.title}]"
-      text_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
-      # Center the text horizontally
-      text_rect = text_surface.get_rect(center=(self.width // 2, 20))
-      self.screen.blit(text_surface, text_rect)
+    if self._simulating:
+      self._render_simulation_banner()
+
+class StageTrial(Trial, abstract=True):
+  """
+  Shared light, visual cue and render helpers for the training stage trials.
+  """
+  __slots__ = (
+    "start_time", "water_start_time", "cue_side", "visual_cue",
+    "nose_port_light", "left_lever_light", "right_lever_light",
+    "_rendered_visual_cue", "_rendered_nose_port_light",
+  )
+
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+
+    # Visual cue and nose port light last pushed to the hardware, so unchanged
+    # state is not sent again every frame
+    self._rendered_visual_cue = None
+    self._rendered_nose_port_light = None
+
+  def _check_canceled(self, events):
+    """Check for an escape key press, marking the trial as canceled if found"""
+    if K_ESCAPE in events:
+      log("Trial canceled", "info")
+      self.add_data("trial_canceled", True)
+      self.add_data("trial_outcome", TrialOutcome.CANCELLED)
+      return True
+    return False
+
+  def _check_trial_blocked(self, states=None):
+    """Check if the trial should be blocked due to active nose poke or lever press"""
+    if states is None:
+      states = self.gpio.get_gpio_state()
+    for key in BLOCKING_INPUTS:
+      if states[key]:
+        return True
+    return False
+
+  def _update_water_delivery(self):
+    """Deliver water once the reward is triggered, closing the valve after the configured duration"""
+    current_time = self._frame_time
+
+    # Start water delivery when reward is triggered
+    if (self._flags & (FLAG_REWARD_TRIGGERED | FLAG_WATER_DELIVERED)) == FLAG_REWARD_TRIGGERED:
+      self.gpio.set_input_port(True)
+      self._flags |= FLAG_WATER_DELIVERED
+      self.water_start_time = current_time
+      log("Water delivery started", "success")
+      self.add_event(TRIAL_EVENTS["WATER_DELIVERY_START"])
+
+    # Check if water delivery duration has elapsed
+    elif (self._flags & (FLAG_WATER_DELIVERED | FLAG_WATER_DELIVERY_COMPLETE)) == FLAG_WATER_DELIVERED:
+      if current_time - self.water_start_time >= self.config.valve_open:
+        self.gpio.set_input_port(False)
+        self._flags |= FLAG_WATER_DELIVERY_COMPLETE
+        log("Water delivery complete", "success")
+        self.add_event(TRIAL_EVENTS["WATER_DELIVERY_COMPLETE"])
+
+  def _update_nose_port_state(self):
+    """Update nose port light and visual cue based on nose port entry"""
+    if self._flags & FLAG_NOSE_PORT_ENTRY:
+      self.nose_port_light = False
+
+  def _update_visual_cue(self):
+    # Update visual state, only when it has changed since the last update
+    if self._simulating or self.visual_cue == self._rendered_visual_cue:
+      return
+    self._rendered_visual_cue = self.visual_cue
+    if self.visual_cue:
+      self.display.draw_alternating_pattern(self.cue_side)
+    else:
+      self.display.clear_displays()
+
+  def _update_nose_port_light(self):
+    # Update nose port light, only when it has changed since the last update
+    if self.nose_port_light != self._rendered_nose_port_light:
+      self._rendered_nose_port_light = self.nose_port_light
+      self.gpio.set_led_port(self.nose_port_light)
 
-class Stage1(Trial):
+  def _update_lever_lights(self):
+    # Update lever lights
+    self.gpio.set_led_lever_left(self.left_lever_light)
+    self.gpio.set_led_lever_right(self.right_lever_light)
+
+  def _pre_render_tasks(self):
+    # Clear screen
+    self.screen.fill((0, 0, 0))
+
+  def _post_render_tasks(self):
+    # Add simulation mode banner if in simulation mode
+    if self._simulating:
+      self._render_simulation_banner()
+
+class Stage1(StageTrial):
   """
   Trial Stage 1: Nose port entry and lever press
   Description: At the beginning of each trial, lit up the nose port light and deliver water.
@@ -199,6 +435,8 @@ class Stage1(Trial):
     port light upon mouse enters the nose port. Record all events time, such as
     nose port entry, lever press, etc.
   """
+  __slots__ = ()
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.title = "trial_stage_1"
@@ -208,27 +446,12 @@ class Stage1(Trial):
     # Light state
     self.nose_port_light = False
 
-    # Water delivery state
-    self.delivered_water = False
-    self.water_delivery_complete = False
-
     # Visual cue state
     self.visual_cue = False
 
-    # Nose port state
-    self.nose_port_entry = False
-    self.nose_port_exit = False
-
-    # Lever state
-    self.left_lever_pressed = False
-    self.right_lever_pressed = False
-
     # Trial parameters
     self.cue_side = random.choice(["left", "right"])
 
-    # Trial events
-    self.events = []
-
   def on_enter(self):
     self.start_time = pygame.time.get_ticks()
     self.water_start_time = pygame.time.get_ticks() # Start water delivery immediately
@@ -245,7 +468,7 @@ class Stage1(Trial):
     self.add_event(TRIAL_EVENTS["VISUAL_CUE_START"])
 
     # Clear the displays and randomly select the display to show the visual cue
-    if not self.gpio.is_simulating_gpio():
+    if not self._simulating:
       self.display.clear_displays()
       self.display.draw_alternating_pattern(self.cue_side)
       log("Visual cue displayed on the " + self.cue_side + " side", "success")
@@ -254,85 +477,63 @@ class Stage1(Trial):
 
   def on_exit(self):
     super().on_exit()
-    self.add_data("events", self.events)
+    self.add_data("events", self.get_events())
 
   def _update_water_delivery(self):
-    current_time = pygame.time.get_ticks()
+    current_time = self._frame_time
 
     # Start water delivery at trial start
-    if not self.delivered_water:
+    if not self._flags & FLAG_WATER_DELIVERED:
       self.gpio.set_input_port(True)
-      self.delivered_water = True
+      self._flags |= FLAG_WATER_DELIVERED
+      self.water_start_time = current_time
       log("Water delivery started", "success")
       self.add_event(TRIAL_EVENTS["WATER_DELIVERY_START"])
 
     # Check if water delivery duration has elapsed
-    elif self.delivered_water and not self.water_delivery_complete:
+    elif (self._flags & (FLAG_WATER_DELIVERED | FLAG_WATER_DELIVERY_COMPLETE)) == FLAG_WATER_DELIVERED:
       if current_time - self.water_start_time >= self.config.valve_open:
         self.gpio.set_input_port(False)
-        self.water_delivery_complete = True
+        self._flags |= FLAG_WATER_DELIVERY_COMPLETE
         log("Water delivery complete", "success")
         self.add_event(TRIAL_EVENTS["WATER_DELIVERY_COMPLETE"])
 
-  def _update_nose_port_state(self):
-    """Update nose port light and visual cue based on nose port entry"""
-    if self.nose_port_entry:
-      self.nose_port_light = False
-
   def update(self, events):
+    # GPIO state polled by the device at the start of this frame
+    states = self.gpio.get_last_gpio_state()
+
     # Run update tasks
     self._update_water_delivery()
 
     # Handle PyGame events
-    for event in events:
-      if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
-          log("Trial canceled", "info")
-          self.add_data("trial_canceled", True)
-          self.add_data("trial_outcome", TrialOutcome.CANCELLED)
-          return False
+    if events and self._check_canceled(events):
+      return False
 
     # Track nose port state changes
-    current_nose_state = self.get_gpio_state()["input_ir"]
+    current_nose_state = states["input_ir"]
 
-    if current_nose_state and not self.nose_port_entry:
+    if current_nose_state and not self._flags & FLAG_NOSE_PORT_ENTRY:
       # Detect nose port entry
-      self.nose_port_entry = True
+      self._flags |= FLAG_NOSE_PORT_ENTRY
       log("Nose port entry detected", "info")
       self.add_event(TRIAL_EVENTS["NOSE_PORT_ENTRY"])
 
       # Deactivate the visual cue
       self.visual_cue = False
       self.add_event(TRIAL_EVENTS["VISUAL_CUE_END"])
-    elif not current_nose_state and self.nose_port_entry and not self.nose_port_exit:
+    elif not current_nose_state and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT)) == FLAG_NOSE_PORT_ENTRY:
       # Detect nose port exit
-      self.nose_port_exit = True
+      self._flags |= FLAG_NOSE_PORT_EXIT
       log("Nose port exit detected", "info")
       self.add_event(TRIAL_EVENTS["NOSE_PORT_EXIT"])
 
-    # Update lever state
-    left_lever = self.get_gpio_state()["input_lever_left"]
-    right_lever = self.get_gpio_state()["input_lever_right"]
+    # Capture lever press events
+    self._capture_lever_events(states, self._frame_time, verbose=False)
     self.left_lever_light = False # Lever lights off by default
     self.right_lever_light = False # Lever lights off by default
 
-    # Capture lever press events
-    if left_lever and not self.left_lever_pressed:
-      self.left_lever_pressed = True
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_PRESS"])
-    elif not left_lever and self.left_lever_pressed:
-      self.left_lever_pressed = False
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_RELEASE"])
-
-    if right_lever and not self.right_lever_pressed:
-      self.right_lever_pressed = True
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_PRESS"])
-    elif not right_lever and self.right_lever_pressed:
-      self.right_lever_pressed = False
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_RELEASE"])
-
     # Condition for trial end - must have nose port entry, water delivery complete, AND nose port exit
-    if self.nose_port_entry and self.water_delivery_complete and self.nose_port_exit:
+    if (self._flags & STAGE1_COMPLETE) == STAGE1_COMPLETE:
       self.add_data("trial_outcome", TrialOutcome.SUCCESS)
       return False
 
@@ -343,46 +544,17 @@ class Stage1(Trial):
 
     return True
 
-  def _render_visual_cue(self):
-    # Update visual state
-    if not self.gpio.is_simulating_gpio():
-      if self.visual_cue:
-        self.display.draw_alternating_pattern(self.cue_side)
-      else:
-        self.display.clear_displays()
-
-  def _update_nose_port_light(self):
-    # Update nose port light
-    self.gpio.set_led_port(self.nose_port_light)
-
-  def _update_lever_lights(self):
-    # Update lever lights
-    self.gpio.set_led_lever_left(self.left_lever_light)
-    self.gpio.set_led_lever_right(self.right_lever_light)
-
-  def _pre_render_tasks(self):
-    # Clear screen
-    self.screen.fill((0, 0, 0))
-
-  def _post_render_tasks(self):
-    # Add simulation mode banner if in simulation mode
-    if self.gpio.is_simulating_gpio() and self.simulation_font:
-      banner_text = f"[SIMULATION - {self.title}]"
-      text_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
-      text_rect = text_surface.get_rect(center=(self.width // 2, 20))
-      self.screen.blit(text_surface, text_rect)
-
   def render(self):
     # Run pre-render tasks
     self._pre_render_tasks()
 
     # Run render tasks
-    self._render_visual_cue()
+    self._update_visual_cue()
 
     # Run post-render tasks
     self._post_render_tasks()
 
-class Stage2(Trial):
+class Stage2(StageTrial):
   """
   Trial Stage 2: Lever press for reward
   Description: At the beginning of each trial, randomly display the visual cue on one of the
@@ -390,6 +562,8 @@ class Stage2(Trial):
     cue upon lever press. Start the ITI counting after the mouse exits the nose port after
     obtaining water reward.
   """
+  __slots__ = ("trial_blocked", "visual_cue_active", "is_lever_pressed")
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.title = "trial_stage_2"
@@ -398,36 +572,22 @@ class Stage2(Trial):
 
     # Trial state
     self.trial_blocked = False
-    self.reward_triggered = False
 
     # Light state
     self.nose_port_light = False
     self.left_lever_light = False
     self.right_lever_light = False
 
-    # Water delivery state
-    self.delivered_water = False
-    self.water_delivery_complete = False
-
     # Visual cue state
     self.visual_cue_active = False # To aid in tracking the visual cue state
     self.visual_cue = False
 
-    # Nose port state
-    self.nose_port_entry = False
-    self.nose_port_exit = False
-
     # Lever state
     self.is_lever_pressed = False
-    self.left_lever_pressed = False
-    self.right_lever_pressed = False
 
     # Trial parameters
     self.cue_side = random.choice(["left", "right"])
 
-    # Trial events
-    self.events = []
-
   def on_enter(self):
     self.start_time = pygame.time.get_ticks()
     super().on_enter()
@@ -438,7 +598,7 @@ class Stage2(Trial):
     self.right_lever_light = False
 
     # Clear the displays
-    if not self.gpio.is_simulating_gpio():
+    if not self._simulating:
       self.display.clear_displays()
 
     # Check if the trial should be blocked
@@ -455,11 +615,14 @@ class Stage2(Trial):
 
   def on_exit(self):
     super().on_exit()
-    self.add_data("events", self.events)
+    self.add_data("events", self.get_events())
 
   def update(self, events):
+    # GPIO state polled by the device at the start of this frame
+    states = self.gpio.get_last_gpio_state()
+
     # Halt the trial if it is blocked
-    if self.trial_blocked and self._check_trial_blocked():
+    if self.trial_blocked and self._check_trial_blocked(states):
       return True
     else:
       self.trial_blocked = False
@@ -471,86 +634,63 @@ class Stage2(Trial):
         self.add_event(TRIAL_EVENTS["VISUAL_CUE_START"])
 
     # Condition for trial end
-    if self.reward_triggered and self.water_delivery_complete and self.nose_port_exit:
+    if (self._flags & STAGE2_COMPLETE) == STAGE2_COMPLETE:
       log("Trial ended after reward triggered, water delivery, and nose port exit", "success")
       self.add_data("trial_outcome", TrialOutcome.SUCCESS)
       return False
 
     # Handle any PyGame events
-    for event in events:
-      if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
-          log("Trial canceled", "info")
-          self.add_data("trial_canceled", True)
-          self.add_data("trial_outcome", TrialOutcome.CANCELLED)
-          return False
+    if events and self._check_canceled(events):
+      return False
 
     # Handle IO events (works for both real hardware and simulation)
     # Track nose port state changes
-    current_nose_state = self.get_gpio_state()["input_ir"]
+    current_nose_state = states["input_ir"]
 
     # Only consider nose port entry and exit if reward has been triggered
-    if self.reward_triggered:
-      if current_nose_state and not self.nose_port_entry:
-        self.nose_port_entry = True
+    if self._flags & FLAG_REWARD_TRIGGERED:
+      if current_nose_state and not self._flags & FLAG_NOSE_PORT_ENTRY:
+        self._flags |= FLAG_NOSE_PORT_ENTRY
         self.add_event(TRIAL_EVENTS["NOSE_PORT_ENTRY"])
         log("Nose port entry", "info")
-      elif not current_nose_state and self.nose_port_entry and not self.nose_port_exit:
-        self.nose_port_exit = True
+      elif not current_nose_state and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT)) == FLAG_NOSE_PORT_ENTRY:
+        self._flags |= FLAG_NOSE_PORT_EXIT
         self.add_event(TRIAL_EVENTS["NOSE_PORT_EXIT"])
         log("Nose port exit", "info")
 
-    # Update lever state
-    left_lever = self.get_gpio_state()["input_lever_left"]
-    right_lever = self.get_gpio_state()["input_lever_right"]
-
     # Capture lever press events
-    if left_lever and not self.left_lever_pressed:
-      self.left_lever_pressed = True
-      log("Left lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_PRESS"])
-    elif not left_lever and self.left_lever_pressed:
-      self.left_lever_pressed = False
-      log("Left lever released", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_RELEASE"])
-
-    if right_lever and not self.right_lever_pressed:
-      self.right_lever_pressed = True
-      log("Right lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_PRESS"])
-    elif not right_lever and self.right_lever_pressed:
-      self.right_lever_pressed = False
-      log("Right lever released", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_RELEASE"])
+    lever_mask = self._capture_lever_events(states, self._frame_time)
+    left_lever = lever_mask & LEVER_LEFT
+    right_lever = lever_mask & LEVER_RIGHT
 
     # Handle lever press events
-    if (left_lever or right_lever) and not self.is_lever_pressed and not self.reward_triggered:
+    if (left_lever or right_lever) and not self.is_lever_pressed and not self._flags & FLAG_REWARD_TRIGGERED:
       # Check for lever press start
       self.is_lever_pressed = True
 
       # Trigger the reward only if lever is pressed
-      self.reward_triggered = True
+      self._flags |= FLAG_REWARD_TRIGGERED
       log("Lever press reward triggered", "success")
       self.add_event(TRIAL_EVENTS["REWARD_TRIGGERED"])
 
       # Deactivate the visual cue
       self.visual_cue = False
       self.add_event(TRIAL_EVENTS["VISUAL_CUE_END"])
-    elif not (left_lever or right_lever) and self.is_lever_pressed and self.reward_triggered:
+    elif not (left_lever or right_lever) and self.is_lever_pressed and self._flags & FLAG_REWARD_TRIGGERED:
       # Check for lever release
       self.is_lever_pressed = False
 
     # Update lights
-    if not self.reward_triggered and not self.trial_blocked:
+    if not self._flags & FLAG_REWARD_TRIGGERED and not self.trial_blocked:
       # Lever lights have normal behavior until reward is triggered
       self.left_lever_light = not (left_lever or right_lever)
       self.right_lever_light = not (left_lever or right_lever)
-    elif self.reward_triggered:
+    elif self._flags & FLAG_REWARD_TRIGGERED:
       # Lever lights stay off after reward is triggered, only if lever is not pressed
       self.left_lever_light = False
       self.right_lever_light = False
       # Nose port light is on after reward is triggered, only if nose port is not in
-      if not self.nose_port_entry:
+      if not self._flags & FLAG_NOSE_PORT_ENTRY:
         self.nose_port_light = True
 
     # Update tasks
@@ -562,67 +702,6 @@ class Stage2(Trial):
 
     return True
 
-  def _check_trial_blocked(self):
-    """Check if the trial should be blocked due to active nose poke or lever press"""
-    if self.get_gpio_state()["input_lever_left"] or self.get_gpio_state()["input_lever_right"]:
-      return True
-    elif self.get_gpio_state()["input_ir"]:
-      return True
-    return False
-
-  def _update_water_delivery(self):
-    current_time = pygame.time.get_ticks()
-
-    # Start water delivery when reward is triggered
-    if self.reward_triggered and not self.delivered_water:
-      self.gpio.set_input_port(True)
-      self.delivered_water = True
-      self.water_start_time = current_time
-      log("Water delivery started", "success")
-      self.add_event(TRIAL_EVENTS["WATER_DELIVERY_START"])
-
-    # Check if water delivery duration has elapsed
-    elif self.delivered_water and not self.water_delivery_complete:
-      if current_time - self.water_start_time >= self.config.valve_open:
-        self.gpio.set_input_port(False)
-        self.water_delivery_complete = True
-        log("Water delivery complete", "success")
-        self.add_event(TRIAL_EVENTS["WATER_DELIVERY_COMPLETE"])
-
-  def _update_nose_port_state(self):
-    """Update nose port light and visual cue based on nose port entry"""
-    if self.nose_port_entry:
-      self.nose_port_light = False
-
-  def _update_visual_cue(self):
-    # Update visual state
-    if not self.gpio.is_simulating_gpio():
-      if self.visual_cue:
-        self.display.draw_alternating_pattern(self.cue_side)
-      else:
-        self.display.clear_displays()
-
-  def _update_nose_port_light(self):
-    # Update nose port light
-    self.gpio.set_led_port(self.nose_port_light)
-
-  def _update_lever_lights(self):
-    # Update lever lights
-    self.gpio.set_led_lever_left(self.left_lever_light)
-    self.gpio.set_led_lever_right(self.right_lever_light)
-
-  def _pre_render_tasks(self):
-    # Clear screen
-    self.screen.fill((0, 0, 0))
-
-  def _post_render_tasks(self):
-    # Add simulation mode banner if in simulation mode
-    if self.gpio.is_simulating_gpio() and self.simulation_font:
-      banner_text = f"[SIMULATION - {self.title}]"
-      text_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
-      text_rect = text_surface.get_rect(center=(self.width // 2, 20))
-      self.screen.blit(text_surface, text_rect)
-
   def render(self):
     # Run pre-render tasks
     self._pre_render_tasks()
@@ -637,7 +716,7 @@ class Stage2(Trial):
     # Run post-render tasks
     self._post_render_tasks()
 
-class Stage3(Trial):
+class Stage3(StageTrial):
   """
   Trial Stage 3: Nose port entry followed by lever press for reward
   Description: At the beginning of each trial, lit up the nose port light. Upon the mouse entering
@@ -647,6 +726,8 @@ class Stage3(Trial):
     randomly generated cue display time between minimum and maximum cue display time if no lever
     pressing event detected. Premature nose withdraw will induce an error trial and terminate the trial.
   """
+  __slots__ = ("cue_start_time", "cue_duration", "trial_blocked", "is_error_trial", "is_lever_pressed")
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.title = "trial_stage_3"
@@ -656,7 +737,6 @@ class Stage3(Trial):
 
     # Trial state
     self.trial_blocked = False
-    self.reward_triggered = False
     self.is_error_trial = False
 
     # Light state
@@ -664,23 +744,11 @@ class Stage3(Trial):
     self.left_lever_light = False
     self.right_lever_light = False
 
-    # Water delivery state
-    self.delivered_water = False
-    self.water_delivery_complete = False
-
     # Visual cue state
     self.visual_cue = False
 
-    # Nose port state
-    self.nose_port_entry = False
-    self.nose_port_exit = False
-
     # Lever state
     self.is_lever_pressed = False
-    self.left_lever_pressed = False
-    self.left_lever_start_time = None
-    self.right_lever_pressed = False
-    self.right_lever_start_time = None
 
     # Trial parameters
     self.cue_side = random.choice(["left", "right"])
@@ -689,9 +757,6 @@ class Stage3(Trial):
       self.config.cue_maximum
     )
 
-    # Trial events
-    self.events = []
-
   def on_enter(self):
     self.start_time = pygame.time.get_ticks()
     super().on_enter()
@@ -705,22 +770,25 @@ class Stage3(Trial):
       self.nose_port_light = True
 
     # Clear the displays
-    if not self.gpio.is_simulating_gpio():
+    if not self._simulating:
       self.display.clear_displays()
     log("Trial started", "info")
 
   def on_exit(self):
     super().on_exit()
-    self.add_data("events", self.events)
+    self.add_data("events", self.get_events())
     if self.is_error_trial:
       self.add_data("error_trial", True)
       self.add_data("error_type", "premature_withdrawal")
 
   def update(self, events):
-    current_time = pygame.time.get_ticks()
+    current_time = self._frame_time
+
+    # GPIO state polled by the device at the start of this frame
+    states = self.gpio.get_last_gpio_state()
 
     # Halt the trial if it is blocked
-    if self.trial_blocked and self._check_trial_blocked():
+    if self.trial_blocked and self._check_trial_blocked(states):
       return True
     else:
       self.trial_blocked = False
@@ -730,10 +798,8 @@ class Stage3(Trial):
 
     # Condition for trial end - premature nose withdrawal
     if (
-        self.nose_port_entry
-        and not self.nose_port_exit
-        and not self.get_gpio_state()["input_ir"]
-        and not self.water_delivery_complete
+        (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT | FLAG_WATER_DELIVERY_COMPLETE)) == FLAG_NOSE_PORT_ENTRY
+        and not states["input_ir"]
     ):
       log("Premature nose withdrawal", "error")
       # Update lights
@@ -751,7 +817,7 @@ class Stage3(Trial):
       return False
 
     # Condition for trial end - when water delivery is complete and nose port is exited
-    if self.water_delivery_complete and self.nose_port_exit:
+    if (self._flags & WATER_COLLECTED) == WATER_COLLECTED:
       log("Trial ended after water delivery and nose port exit", "success")
       self.add_data("trial_outcome", TrialOutcome.SUCCESS)
 
@@ -766,21 +832,16 @@ class Stage3(Trial):
       return False
 
     # Handle any PyGame events
-    for event in events:
-      if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
-          log("Trial canceled", "info")
-          self.add_data("trial_canceled", True)
-          self.add_data("trial_outcome", TrialOutcome.CANCELLED)
-          return False
+    if events and self._check_canceled(events):
+      return False
 
     # Handle IO events (works for both real hardware and simulation)
     # Track nose port state changes
-    current_nose_state = self.get_gpio_state()["input_ir"]
+    current_nose_state = states["input_ir"]
 
-    if current_nose_state and not self.nose_port_entry:
+    if current_nose_state and not self._flags & FLAG_NOSE_PORT_ENTRY:
       # Detect nose port entry
-      self.nose_port_entry = True
+      self._flags |= FLAG_NOSE_PORT_ENTRY
       self.add_event(TRIAL_EVENTS["NOSE_PORT_ENTRY"])
       log("Nose port entry", "info")
 
@@ -794,43 +855,23 @@ class Stage3(Trial):
       self.left_lever_light = True
       self.right_lever_light = True
       self.nose_port_light = False
-    elif not current_nose_state and self.nose_port_entry and not self.nose_port_exit:
+    elif not current_nose_state and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT)) == FLAG_NOSE_PORT_ENTRY:
       # Detect nose port exit (nose_poke = True means nose is OUT)
-      self.nose_port_exit = True
+      self._flags |= FLAG_NOSE_PORT_EXIT
       self.add_event(TRIAL_EVENTS["NOSE_PORT_EXIT"])
       log("Nose port exit", "info")
 
-    # Update lever state
-    left_lever = self.get_gpio_state()["input_lever_left"]
-    right_lever = self.get_gpio_state()["input_lever_right"]
-
     # Capture lever press events
-    if left_lever and not self.left_lever_pressed:
-      self.left_lever_pressed = True
-      self.left_lever_start_time = current_time
-      log("Left lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_PRESS"])
-    elif not left_lever and self.left_lever_pressed:
-      self.left_lever_pressed = False
-      log("Left lever released", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_RELEASE"], duration=current_time - self.left_lever_start_time)
-
-    if right_lever and not self.right_lever_pressed:
-      self.right_lever_pressed = True
-      self.right_lever_start_time = current_time
-      log("Right lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_PRESS"])
-    elif not right_lever and self.right_lever_pressed:
-      self.right_lever_pressed = False
-      log("Right lever released", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_RELEASE"], duration=current_time - self.right_lever_start_time)
-
-    if (left_lever or right_lever) and not self.is_lever_pressed and self.nose_port_entry and not self.reward_triggered:
+    lever_mask = self._capture_lever_events(states, current_time, durations=True)
+    left_lever = lever_mask & LEVER_LEFT
+    right_lever = lever_mask & LEVER_RIGHT
+
+    if (left_lever or right_lever) and not self.is_lever_pressed and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_REWARD_TRIGGERED)) == FLAG_NOSE_PORT_ENTRY:
       # Check for lever press start
       self.is_lever_pressed = True
 
       # Trigger reward
-      self.reward_triggered = True
+      self._flags |= FLAG_REWARD_TRIGGERED
       log("Nose port entry reward triggered", "success")
       self.add_event(TRIAL_EVENTS["REWARD_TRIGGERED"])
 
@@ -842,7 +883,7 @@ class Stage3(Trial):
       self.left_lever_light = False
       self.right_lever_light = False
       self.nose_port_light = False
-    elif self.is_lever_pressed and not (left_lever or right_lever) and not self.reward_triggered:
+    elif self.is_lever_pressed and not (left_lever or right_lever) and not self._flags & FLAG_REWARD_TRIGGERED:
       # Check for lever release
       log("Lever press released", "info")
       self.is_lever_pressed = False
@@ -855,7 +896,7 @@ class Stage3(Trial):
     self._update_lever_lights()
 
     # Check if cue duration has elapsed without lever press
-    if self.nose_port_entry and not self.reward_triggered and self.cue_start_time:
+    if (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_REWARD_TRIGGERED)) == FLAG_NOSE_PORT_ENTRY and self.cue_start_time:
       if current_time - self.cue_start_time >= self.cue_duration:
         self.visual_cue = False
         log("Cue duration elapsed without lever press", "info")
@@ -866,67 +907,6 @@ class Stage3(Trial):
 
     return True
 
-  def _check_trial_blocked(self):
-    """Check if the trial should be blocked due to active nose poke or lever press"""
-    if self.get_gpio_state()["input_lever_left"] or self.get_gpio_state()["input_lever_right"]:
-      return True
-    elif self.get_gpio_state()["input_ir"]:
-      return True
-    return False
-
-  def _update_water_delivery(self):
-    current_time = pygame.time.get_ticks()
-
-    # Start water delivery when reward is triggered
-    if self.reward_triggered and not self.delivered_water:
-      self.gpio.set_input_port(True)
-      self.delivered_water = True
-      self.water_start_time = current_time
-      log("Water delivery started", "success")
-      self.add_event(TRIAL_EVENTS["WATER_DELIVERY_START"])
-
-    # Check if water delivery duration has elapsed
-    elif self.delivered_water and not self.water_delivery_complete:
-      if current_time - self.water_start_time >= self.config.valve_open:
-        self.gpio.set_input_port(False)
-        self.water_delivery_complete = True
-        log("Water delivery complete", "success")
-        self.add_event(TRIAL_EVENTS["WATER_DELIVERY_COMPLETE"])
-
-  def _update_nose_port_state(self):
-    """Update nose port light and visual cue based on nose port entry"""
-    if self.nose_port_entry:
-      self.nose_port_light = False
-
-  def _update_visual_cue(self):
-    # Update visual state
-    if not self.gpio.is_simulating_gpio():
-      if self.visual_cue:
-        self.display.draw_alternating_pattern(self.cue_side)
-      else:
-        self.display.clear_displays()
-
-  def _update_nose_port_light(self):
-    # Update nose port light
-    self.gpio.set_led_port(self.nose_port_light)
-
-  def _update_lever_lights(self):
-    # Update lever lights
-    self.gpio.set_led_lever_left(self.left_lever_light)
-    self.gpio.set_led_lever_right(self.right_lever_light)
-
-  def _pre_render_tasks(self):
-    # Clear screen
-    self.screen.fill((0, 0, 0))
-
-  def _post_render_tasks(self):
-    # Add simulation mode banner if in simulation mode
-    if self.gpio.is_simulating_gpio() and self.simulation_font:
-      banner_text = f"[SIMULATION - {self.title}]"
-      text_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
-      text_rect = text_surface.get_rect(center=(self.width // 2, 20))
-      self.screen.blit(text_surface, text_rect)
-
   def render(self):
     # Run pre-render tasks
     self._pre_render_tasks()
@@ -941,7 +921,7 @@ class Stage3(Trial):
     self._post_render_tasks()
 
 
-class Stage4(Trial):
+class Stage4(StageTrial):
   """
   Trial Stage 4: Nose port entry followed by correct lever press for reward
   Description: At the beginning of each trial, lit up the nose port light. Upon the mouse entering
@@ -951,6 +931,11 @@ class Stage4(Trial):
   limit whichever comes first. Premature nose withdraw and wrong lever pressing will result in an error
   trial and termination of the trial.
   """
+  __slots__ = (
+    "cue_start_time", "cue_duration", "trial_blocked", "is_error_trial", "error_type",
+    "is_lever_pressed",
+  )
+
   def __init__(self, *args, **kwargs):
     super().__init__(*args, **kwargs)
     self.title = "trial_stage_4"
@@ -960,7 +945,6 @@ class Stage4(Trial):
 
     # Trial state
     self.trial_blocked = False
-    self.reward_triggered = False
     self.is_error_trial = False
 
     # Light state
@@ -968,23 +952,11 @@ class Stage4(Trial):
     self.left_lever_light = False
     self.right_lever_light = False
 
-    # Water delivery state
-    self.delivered_water = False
-    self.water_delivery_complete = False
-
     # Visual cue state
     self.visual_cue = False
 
-    # Nose port state
-    self.nose_port_entry = False
-    self.nose_port_exit = False
-
     # Lever state
     self.is_lever_pressed = False
-    self.left_lever_pressed = False
-    self.left_lever_start_time = None
-    self.right_lever_pressed = False
-    self.right_lever_start_time = None
 
     # Trial parameters
     self.cue_side = random.choice(["left", "right"])
@@ -994,9 +966,6 @@ class Stage4(Trial):
     )
     log(f"Cue will be displayed on {self.cue_side} side", "info")
 
-    # Trial events
-    self.events = []
-
   def on_enter(self):
     self.start_time = pygame.time.get_ticks()
     super().on_enter()
@@ -1010,23 +979,26 @@ class Stage4(Trial):
       self.nose_port_light = True
 
     # Clear the displays
-    if not self.gpio.is_simulating_gpio():
+    if not self._simulating:
       self.display.clear_displays()
     log("Trial started", "info")
 
   def on_exit(self):
     super().on_exit()
-    self.add_data("events", self.events)
+    self.add_data("events", self.get_events())
     if self.is_error_trial:
       self.add_data("error_trial", True)
       if hasattr(self, 'error_type'):
         self.add_data("error_type", self.error_type)
 
   def update(self, events):
-    current_time = pygame.time.get_ticks()
+    current_time = self._frame_time
+
+    # GPIO state polled by the device at the start of this frame
+    states = self.gpio.get_last_gpio_state()
 
     # Halt the trial if it is blocked
-    if self.trial_blocked and self._check_trial_blocked():
+    if self.trial_blocked and self._check_trial_blocked(states):
       return True
     else:
       self.trial_blocked = False
@@ -1036,10 +1008,8 @@ class Stage4(Trial):
 
     # Condition for trial end - premature nose withdrawal
     if (
-        self.nose_port_entry
-        and not self.nose_port_exit
-        and not self.get_gpio_state()["input_ir"]
-        and not self.water_delivery_complete
+        (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT | FLAG_WATER_DELIVERY_COMPLETE)) == FLAG_NOSE_PORT_ENTRY
+        and not states["input_ir"]
     ):
       log("Premature nose withdrawal", "error")
       # Update lights
@@ -1058,7 +1028,7 @@ class Stage4(Trial):
       return False
 
     # Condition for trial end - when water delivery is complete and nose port is exited
-    if self.water_delivery_complete and self.nose_port_exit:
+    if (self._flags & WATER_COLLECTED) == WATER_COLLECTED:
       log("Trial ended after water delivery and nose port exit", "success")
       self.add_data("trial_outcome", TrialOutcome.SUCCESS)
 
@@ -1073,20 +1043,15 @@ class Stage4(Trial):
       return False
 
     # Handle any PyGame events
-    for event in events:
-      if event.type == pygame.KEYDOWN:
-        if event.key == pygame.K_ESCAPE:
-          log("Trial canceled", "info")
-          self.add_data("trial_canceled", True)
-          self.add_data("trial_outcome", TrialOutcome.CANCELLED)
-          return False
+    if events and self._check_canceled(events):
+      return False
 
     # Track nose port state changes
-    current_nose_state = self.get_gpio_state()["input_ir"]
+    current_nose_state = states["input_ir"]
 
-    if current_nose_state and not self.nose_port_entry:
+    if current_nose_state and not self._flags & FLAG_NOSE_PORT_ENTRY:
       # Detect nose port entry
-      self.nose_port_entry = True
+      self._flags |= FLAG_NOSE_PORT_ENTRY
       self.add_event(TRIAL_EVENTS["NOSE_PORT_ENTRY"])
       log("Nose port entry", "info")
 
@@ -1100,39 +1065,19 @@ class Stage4(Trial):
       self.left_lever_light = True
       self.right_lever_light = True
       self.nose_port_light = False
-    elif not current_nose_state and self.nose_port_entry and not self.nose_port_exit:
+    elif not current_nose_state and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_NOSE_PORT_EXIT)) == FLAG_NOSE_PORT_ENTRY:
       # Detect nose port exit (nose_poke = False means nose is OUT)
-      self.nose_port_exit = True
+      self._flags |= FLAG_NOSE_PORT_EXIT
       self.add_event(TRIAL_EVENTS["NOSE_PORT_EXIT"])
       log("Nose port exit", "info")
 
-    # Update lever state
-    left_lever = self.get_gpio_state()["input_lever_left"]
-    right_lever = self.get_gpio_state()["input_lever_right"]
-
     # Capture lever press events
-    if left_lever and not self.left_lever_pressed:
-      self.left_lever_pressed = True
-      self.left_lever_start_time = current_time
-      log("Left lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_PRESS"])
-    elif not left_lever and self.left_lever_pressed:
-      self.left_lever_pressed = False
-      log("Left lever released", "info")
-      self.add_event(TRIAL_EVENTS["LEFT_LEVER_RELEASE"], duration=current_time - self.left_lever_start_time)
-
-    if right_lever and not self.right_lever_pressed:
-      self.right_lever_pressed = True
-      self.right_lever_start_time = current_time
-      log("Right lever pressed", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_PRESS"])
-    elif not right_lever and self.right_lever_pressed:
-      self.right_lever_pressed = False
-      log("Right lever released", "info")
-      self.add_event(TRIAL_EVENTS["RIGHT_LEVER_RELEASE"], duration=current_time - self.right_lever_start_time)
+    lever_mask = self._capture_lever_events(states, current_time, durations=True)
+    left_lever = lever_mask & LEVER_LEFT
+    right_lever = lever_mask & LEVER_RIGHT
 
     # Handle lever press events - STAGE 4 SPECIFIC LOGIC
-    if (left_lever or right_lever) and not self.is_lever_pressed and self.nose_port_entry and not self.reward_triggered:
+    if (left_lever or right_lever) and not self.is_lever_pressed and (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_REWARD_TRIGGERED)) == FLAG_NOSE_PORT_ENTRY:
       # Check for lever press start
       self.is_lever_pressed = True
 
@@ -1165,7 +1110,7 @@ class Stage4(Trial):
 
       if correct_lever_pressed:
         # Trigger reward only for correct lever
-        self.reward_triggered = True
+        self._flags |= FLAG_REWARD_TRIGGERED
         log("Correct lever press reward triggered", "success")
         self.add_event(TRIAL_EVENTS["REWARD_TRIGGERED"])
 
@@ -1177,7 +1122,7 @@ class Stage4(Trial):
         self.left_lever_light = False
         self.right_lever_light = False
         self.nose_port_light = False
-    elif self.is_lever_pressed and not (left_lever or right_lever) and not self.reward_triggered:
+    elif self.is_lever_pressed and not (left_lever or right_lever) and not self._flags & FLAG_REWARD_TRIGGERED:
       # Check for lever release
       log("Lever press released", "info")
       self.is_lever_pressed = False
@@ -1190,7 +1135,7 @@ class Stage4(Trial):
     self._update_lever_lights()
 
     # Check if cue duration has elapsed without lever press
-    if self.nose_port_entry and not self.reward_triggered and self.cue_start_time:
+    if (self._flags & (FLAG_NOSE_PORT_ENTRY | FLAG_REWARD_TRIGGERED)) == FLAG_NOSE_PORT_ENTRY and self.cue_start_time:
       if current_time - self.cue_start_time >= self.cue_duration:
         self.visual_cue = False
         log("Cue duration elapsed without lever press", "info")
@@ -1201,67 +1146,6 @@ class Stage4(Trial):
 
     return True
 
-  def _check_trial_blocked(self):
-    """Check if the trial should be blocked due to active nose poke or lever press"""
-    if self.get_gpio_state()["input_lever_left"] or self.get_gpio_state()["input_lever_right"]:
-      return True
-    elif self.get_gpio_state()["input_ir"]:
-      return True
-    return False
-
-  def _update_water_delivery(self):
-    current_time = pygame.time.get_ticks()
-
-    # Start water delivery when reward is triggered
-    if self.reward_triggered and not self.delivered_water:
-      self.gpio.set_input_port(True)
-      self.delivered_water = True
-      self.water_start_time = current_time
-      log("Water delivery started", "success")
-      self.add_event(TRIAL_EVENTS["WATER_DELIVERY_START"])
-
-    # Check if water delivery duration has elapsed
-    elif self.delivered_water and not self.water_delivery_complete:
-      if current_time - self.water_start_time >= self.config.valve_open:
-        self.gpio.set_input_port(False)
-        self.water_delivery_complete = True
-        log("Water delivery complete", "success")
-        self.add_event(TRIAL_EVENTS["WATER_DELIVERY_COMPLETE"])
-
-  def _update_nose_port_state(self):
-    """Update nose port light and visual cue based on nose port entry"""
-    if self.nose_port_entry:
-      self.nose_port_light = False
-
-  def _update_visual_cue(self):
-    # Update visual state
-    if not self.gpio.is_simulating_gpio():
-      if self.visual_cue:
-        self.display.draw_alternating_pattern(self.cue_side)
-      else:
-        self.display.clear_displays()
-
-  def _update_nose_port_light(self):
-    # Update nose port light
-    self.gpio.set_led_port(self.nose_port_light)
-
-  def _update_lever_lights(self):
-    # Update lever lights
-    self.gpio.set_led_lever_left(self.left_lever_light)
-    self.gpio.set_led_lever_right(self.right_lever_light)
-
-  def _pre_render_tasks(self):
-    # Clear screen
-    self.screen.fill((0, 0, 0))
-
-  def _post_render_tasks(self):
-    # Add simulation mode banner if in simulation mode
-    if self.gpio.is_simulating_gpio() and self.simulation_font:
-      banner_text = f"[SIMULATION - {self.title}]"
-      text_surface = self.simulation_font.render(banner_text, True, (255, 255, 255))
-      text_rect = text_surface.get_rect(center=(self.width // 2, 20))
-      self.screen.blit(text_surface, text_rect)
-
   def render(self):
     # Run pre-render tasks
     self._pre_render_tasks()
@@ -43,6 +43,10 @@ class DisplayController:
     self.width = 128
     self.height = 64
 
+    # Content last pushed to each display, used to skip redrawing unchanged content
+    self._left_content = None
+    self._right_content = None
+
     # Create blank images for drawing
     self.image_left = Image.new("1", (self.width, self.height))
     self.image_right = Image.new("1", (self.width, self.height))
@@ -89,14 +93,16 @@ class DisplayController:
     log("Simulated displays initialized successfully", "success")
 
   def draw_test_pattern(self, side="both"):
-    if side in ["left", "both"]:
+    if side in ["left", "both"] and self._left_content != "test":
+      self._left_content = "test"
       self.draw_left.rectangle((0, 0, self.width, self.height), outline=1, fill=0)
       self.draw_left.text((5, 5), "Left Display", font=self.font, fill=1)
       self.draw_left.rectangle((20, 30, 108, 50), outline=1, fill=1)
       self.display_left.image(self.image_left)
       self.display_left.show()
 
-    if side in ["right", "both"]:
+    if side in ["right", "both"] and self._right_content != "test":
+      self._right_content = "test"
       self.draw_right.rectangle((0, 0, self.width, self.height), outline=1, fill=0)
       self.draw_right.text((5, 5), "Right Display", font=self.font, fill=1)
       self.draw_right.ellipse((20, 30, 108, 50), outline=1, fill=1)
@@ -133,6 +139,12 @@ class DisplayController:
 
   def draw_alternating_pattern(self, side="both", stripe_orientation="vertical"):
     """Draw circles using stripes with varying lengths to create circular appearance"""
+    content = ("pattern", stripe_orientation)
+    draw_left = side in ["left", "both"] and self._left_content != content
+    draw_right = side in ["right", "both"] and self._right_content != content
+    if not (draw_left or draw_right):
+      return
+
     # Common parameters
     circle_center_x = self.width // 2
     circle_center_y = self.height // 2
@@ -140,19 +152,26 @@ class DisplayController:
     num_stripes = 24
     stripe_width = self.width // num_stripes
 
-    if side in ["left", "both"]:
+    if draw_left:
+      self._left_content = content
       self.draw_left.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
       self._draw_circle_stripes(self.draw_left, stripe_orientation, circle_center_x, circle_center_y, circle_radius, num_stripes, stripe_width)
       self.display_left.image(self.image_left)
       self.display_left.show()
 
-    if side in ["right", "both"]:
+    if draw_right:
+      self._right_content = content
       self.draw_right.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
       self._draw_circle_stripes(self.draw_right, stripe_orientation, circle_center_x, circle_center_y, circle_radius, num_stripes, stripe_width)
       self.display_right.image(self.image_right)
       self.display_right.show()
 
   def clear_displays(self):
+    # Both displays are already blank
+    if self._left_content == "clear" and self._right_content == "clear":
+      return
+    self._left_content = "clear"
+    self._right_content = "clear"
     self.draw_left.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
     self.draw_right.rectangle((0, 0, self.width, self.height), outline=0, fill=0)
     self.display_left.fill(0)
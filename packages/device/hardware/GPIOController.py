@@ -6,7 +6,7 @@ Description: Handles the input and output of the behavior box
 License: MIT
 """
 
-from device.hardware.constants import LED_LEVER_LEFT, LED_LEVER_RIGHT, LED_PORT, INPUT_PORT, INPUT_IR, INPUT_LEVER_LEFT, INPUT_LEVER_RIGHT
+from device.hardware.constants import LED_LEVER_LEFT, LED_LEVER_RIGHT, LED_PORT, INPUT_PORT, INPUT_IR, INPUT_LEVER_LEFT, INPUT_LEVER_RIGHT, DEFAULT_GPIO_STATE
 from device.utils.logger import log
 
 try:
@@ -20,6 +20,9 @@ class GPIOController:
   def __init__(self):
     self._simulate_gpio = SIMULATION_MODE
 
+    # Output states set since the last flush, written to the pins by flush_outputs()
+    self._pending_outputs = {}
+
     if not self._simulate_gpio:
       try:
         # Setup GPIO inputs using gpiozero (initial_value=True by default)
@@ -32,6 +35,12 @@ class GPIOController:
         self.led_lever_left = DigitalOutputDevice(LED_LEVER_LEFT, initial_value=False)
         self.led_lever_right = DigitalOutputDevice(LED_LEVER_RIGHT, initial_value=False)
         self.led_port = DigitalOutputDevice(LED_PORT, initial_value=False)
+        self._output_devices = {
+          "input_port": self.input_port,
+          "led_port": self.led_port,
+          "led_lever_left": self.led_lever_left,
+          "led_lever_right": self.led_lever_right
+        }
 
         self._gpio_state = {
           "input_lever_left": self.input_lever_left.is_pressed,
@@ -56,58 +65,64 @@ class GPIOController:
   def _init_simulated_gpio(self):
     log("Initializing simulated GPIO...", "info")
     self._simulate_gpio = True
-    self._gpio_state = {
-      "input_lever_left": False,
-      "input_lever_right": False,
-      "input_ir": False,
-      "input_port": False,
-      "led_port": False,
-      "led_lever_left": False,
-      "led_lever_right": False
-    }
+    self._gpio_state = DEFAULT_GPIO_STATE.copy()
     log("Simulated GPIO initialized successfully", "success")
 
   def _update_gpio_state(self):
-    """Update the GPIO state"""
+    """
+    Update the GPIO state in place, reading only the input pins since the
+    output states are already recorded by the set_* methods
+    """
     if not self._simulate_gpio:
-      self._gpio_state = {
-        "input_lever_left": self.input_lever_left.is_pressed,
-        "input_lever_right": self.input_lever_right.is_pressed,
-        "input_ir": self.input_ir.value,
-        "input_port": self.input_port.value,
-        "led_port": self.led_port.value,
-        "led_lever_left": self.led_lever_left.value,
-        "led_lever_right": self.led_lever_right.value
-      }
+      gpio_state = self._gpio_state
+      gpio_state["input_lever_left"] = self.input_lever_left.is_pressed
+      gpio_state["input_lever_right"] = self.input_lever_right.is_pressed
+      gpio_state["input_ir"] = self.input_ir.value
 
   def get_gpio_state(self):
     """Get the GPIO state"""
     self._update_gpio_state()
     return self._gpio_state
 
+  def get_last_gpio_state(self):
+    """Get the GPIO state from the last get_gpio_state() call without reading the pins again"""
+    return self._gpio_state
+
   def set_input_port(self, state):
     """Control water port state"""
     self._gpio_state["input_port"] = state
-    if not self._simulate_gpio:
-      self.input_port.value = state
+    self._pending_outputs["input_port"] = state
 
   def set_led_port(self, state):
     """Control nose port light LED state"""
     self._gpio_state["led_port"] = state
-    if not self._simulate_gpio:
-      self.led_port.value = state
+    self._pending_outputs["led_port"] = state
 
   def set_led_lever_left(self, state):
     """Control left lever light LED state"""
     self._gpio_state["led_lever_left"] = state
-    if not self._simulate_gpio:
-      self.led_lever_left.value = state
+    self._pending_outputs["led_lever_left"] = state
 
   def set_led_lever_right(self, state):
     """Control right lever light LED state"""
     self._gpio_state["led_lever_right"] = state
+    self._pending_outputs["led_lever_right"] = state
+
+  def flush_outputs(self):
+    """
+    Write the output states set since the last flush, called once per frame so
+    repeated writes within a frame collapse to one and unchanged pins are skipped
+    """
+    pending = self._pending_outputs
+    if not pending:
+      return
     if not self._simulate_gpio:
-      self.led_lever_right.value = state
+      output_devices = self._output_devices
+      for name, state in pending.items():
+        device = output_devices[name]
+        if device.value != state:
+          device.value = state
+    pending.clear()
 
   def simulate_input_lever_left(self, state):
     """Simulate left lever press/release"""
@@ -145,6 +160,7 @@ class GPIOController:
     self.set_led_port(False)
     self.set_led_lever_left(False)
     self.set_led_lever_right(False)
+    self.flush_outputs()
 
   def __del__(self):
     """Cleanup GPIO on object destruction"""
@@ -18,7 +18,8 @@ from .constants import (
     INPUT_PORT,
     INPUT_IR,
     INPUT_LEVER_LEFT,
-    INPUT_LEVER_RIGHT
+    INPUT_LEVER_RIGHT,
+    DEFAULT_GPIO_STATE
 )
 
 __all__ = [
@@ -34,4 +35,5 @@ __all__ = [
   'INPUT_IR',
   'INPUT_LEVER_LEFT',
   'INPUT_LEVER_RIGHT',
+  'DEFAULT_GPIO_STATE',
 ]
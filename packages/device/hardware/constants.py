@@ -20,3 +20,14 @@ INPUT_PORT = 25
 INPUT_IR = 17
 INPUT_LEVER_LEFT = 24
 INPUT_LEVER_RIGHT = 23
+
+# Default GPIO state, all inputs inactive and all outputs off
+DEFAULT_GPIO_STATE = {
+  "input_lever_left": False,
+  "input_lever_right": False,
+  "input_ir": False,
+  "input_port": False,
+  "led_port": False,
+  "led_lever_left": False,
+  "led_lever_right": False
+}
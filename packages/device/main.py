@@ -23,6 +23,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Behavior Box Device')
     parser.add_argument('--port', '-p', type=int, default=8765,
                         help='Port for dashboard connection (default: 8765)')
+    parser.add_argument('--debug', '-d', action='store_true',
+                        help='Log debug messages, including input state changes')
     args = parser.parse_args()
 
-    main(port=args.port)
+    main(port=args.port, debug=args.debug)
@@ -6,7 +6,7 @@ Description: Utility functions for the device script, including logging and rand
 License: MIT
 """
 
-from .logger import log, set_message_queue
-from .helpers import Randomness
+from .logger import log, set_message_queue, set_debug, is_enabled_for
+from .helpers import Randomness, get_sysfont
 
-__all__ = ['log', 'set_message_queue', 'Randomness']
+__all__ = ['log', 'set_message_queue', 'set_debug', 'is_enabled_for', 'Randomness', 'get_sysfont']
@@ -2,14 +2,44 @@
 Filename: device/utils/helpers.py
 Author: Henry Burgess
 Date: 2025-07-29
-Description: Helper functions for the device script, including trial outcome codes and random number generation
+Description: Helper functions for the device script, including trial outcome codes, random number generation and font loading
 License: MIT
 """
 
 from enum import Enum
+from functools import cached_property, lru_cache
+import math
 import random
-from typing import Optional
-import numpy as np
+from typing import Optional, TYPE_CHECKING
+import pygame
+
+if TYPE_CHECKING:
+  import numpy
+
+# Loaded system fonts, keyed by (name, size, bold)
+_SYS_FONT_CACHE = {}
+
+def get_sysfont(name: str, size: int, bold: bool = False) -> pygame.font.Font:
+  """
+  Get a system font, loading it only on first use.
+
+  pygame.font.SysFont scans the system font directories on each call,
+  which is slow on the Raspberry Pi, so loaded fonts are reused.
+
+  Args:
+      name: Font family name
+      size: Font size in points
+      bold: Whether to load the bold variant
+
+  Returns:
+      The loaded pygame font
+  """
+  key = (name, size, bold)
+  font = _SYS_FONT_CACHE.get(key)
+  if font is None:
+    font = pygame.font.SysFont(name, size, bold=bold)
+    _SYS_FONT_CACHE[key] = font
+  return font
 
 class TrialOutcome(str, Enum):
   """
@@ -23,6 +53,14 @@ class TrialOutcome(str, Enum):
   FAILURE_OTHER = "failure_other"
   CANCELLED = "cancelled"
 
+@lru_cache(maxsize=32)
+def _iti_normalization(min: float, max: float, decay: float) -> float:
+  """
+  Get the truncated exponential normalization factor 1 - exp(-decay * (max - min)),
+  computed once per set of ITI parameters.
+  """
+  return -math.expm1(-decay * (max - min))
+
 class Randomness:
   """
   A class for generating reproducible random values with configurable seeds.
@@ -37,11 +75,13 @@ class Randomness:
         seed: Optional seed for reproducible random sequences
     """
     self.seed = seed
-    if seed is not None:
-        random.seed(seed)
-        np.random.seed(seed)
     self._random_state = random.Random(seed)
-    self._np_random_state = np.random.RandomState(seed)
+
+  @cached_property
+  def _np_random_state(self):
+    """NumPy generator for batched draws, created on first use so numpy is only imported when needed"""
+    import numpy as np
+    return np.random.default_rng(self.seed)
 
   def set_seed(self, seed: int):
     """
@@ -52,7 +92,8 @@ class Randomness:
     """
     self.seed = seed
     self._random_state.seed(seed)
-    self._np_random_state.seed(seed)
+    # Recreated from the new seed on next use
+    self.__dict__.pop("_np_random_state", None)
 
   def generate_iti(self, min: float = 1000, max: float = 10000,
                           decay: float = 0.001) -> float:
@@ -70,18 +111,45 @@ class Randomness:
         Random ITI duration in milliseconds
     """
     # Generate uniform random value between 0 and 1
-    u = self._np_random_state.uniform(0, 1)
+    u = self._random_state.random()
 
     # Use inverse transform sampling for truncated exponential distribution
     # We want an exponential distribution truncated to [min, max]
     # The CDF of truncated exponential is: F(x) = (1 - exp(-lambda * (x - min))) / (1 - exp(-lambda * (max - min)))
     # The inverse is: x = min - ln(1 - u * (1 - exp(-lambda * (max - min)))) / lambda
 
-    # Calculate the normalization factor
-    normalization = 1 - np.exp(-decay * (max - min))
+    # Get the normalization factor, cached since the parameters rarely change
+    normalization = _iti_normalization(min, max, decay)
 
     # Generate the truncated exponential value
-    mapped_value = min - np.log(1 - u * normalization) / decay
+    mapped_value = min - math.log1p(-u * normalization) / decay
     mapped_value = int(mapped_value)
 
     return mapped_value
+
+  def generate_iti_batch(self, n: int, min: float = 1000, max: float = 10000,
+                         decay: float = 0.001) -> "numpy.ndarray":
+    """
+    Generate n random inter-trial intervals (ITIs) at once, using the same
+    truncated exponential distribution as generate_iti. Values are drawn from
+    a separate NumPy generator seeded with the same seed.
+
+    Args:
+        n: Number of ITIs to generate
+        min: Minimum ITI duration in milliseconds
+        max: Maximum ITI duration in milliseconds
+        decay: Decay constant for exponential distribution (lambda)
+
+    Returns:
+        Array of n random ITI durations in milliseconds
+    """
+    import numpy as np
+
+    # Draw all uniform values in one call
+    u = self._np_random_state.random(n)
+
+    normalization = _iti_normalization(min, max, decay)
+
+    # Vectorized inverse transform, truncated towards zero like int()
+    mapped_values = min - np.log1p(-u * normalization) / decay
+    return mapped_values.astype(np.int32)
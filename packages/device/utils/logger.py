@@ -6,8 +6,12 @@ Description: Logger for the device script, handles logging to the console and me
 License: MIT
 """
 
-import datetime
+import atexit
 import os
+import queue
+import sys
+import threading
+import time
 
 # Log states
 LOG_STATES = {
@@ -19,39 +23,181 @@ LOG_STATES = {
     "debug": "DEBUG",
 }
 
+# Bracketed prefix for each log state, built once
+_LOG_PREFIXES = {state: f"[{label}]" for state, label in LOG_STATES.items()}
+_INFO_PREFIX = _LOG_PREFIXES["info"]
+
 # Global message queue reference
 _device_message_queue = None
 
+# Debug messages are dropped unless enabled
+_debug_enabled = False
+
+# device.log path, written with the console by a background thread so logging never waits on output
+_LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'logs')
+_LOG_PATH = os.path.join(_LOG_DIR, 'device.log')
+_LOG_BATCH_SIZE = 64
+_LOG_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+_log_file_queue = None
+_log_file_thread = None
+
+# Whether the last device.log write failed, so the error is reported once
+_log_file_failed = False
+
+# Timestamp string for the current second, reformatted only when the second changes
+_timestamp_second = None
+_timestamp = ""
+
+def _get_timestamp():
+    """Get the current local time formatted to the second"""
+    global _timestamp_second, _timestamp
+    second = int(time.time())
+    if second != _timestamp_second:
+        _timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+        _timestamp_second = second
+    return _timestamp
+
+def _write_all(fd, data):
+    """Write data to the log file, continuing after partial writes"""
+    while data:
+        data = data[os.write(fd, data):]
+
+def _report_log_file_error(error):
+    """Report a device.log failure on stderr, once until the file can be written again"""
+    global _log_file_failed
+    if not _log_file_failed:
+        _log_file_failed = True
+        sys.stderr.write(f"Failed to write {_LOG_PATH}: {error}\n")
+        sys.stderr.flush()
+
+def _close_log_file(fd):
+    """Close the device.log descriptor, ignoring errors since the file is no longer written"""
+    try:
+        os.close(fd)
+    except OSError:
+        pass
+
+def _write_log_batch(fd, text):
+    """
+    Write text to the console and device.log, opening the file if fd is None.
+    Returns the descriptor for the next batch, or None if the file could not be written.
+    """
+    global _log_file_failed
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+    try:
+        if fd is None:
+            os.makedirs(_LOG_DIR, exist_ok=True)
+            fd = os.open(_LOG_PATH, _LOG_FLAGS, 0o644)
+        _write_all(fd, text.encode())
+    except OSError as e:
+        # The console still gets the lines, the file is retried on the next batch
+        _report_log_file_error(e)
+        if fd is not None:
+            _close_log_file(fd)
+        return None
+
+    _log_file_failed = False
+    return fd
+
+def _write_log_file(file_queue):
+    """Drain formatted messages from the queue to the console and device.log in batches"""
+    fd = None
+    try:
+        while True:
+            message = file_queue.get()
+            batch = []
+            while message is not None:
+                batch.append(message)
+                if len(batch) >= _LOG_BATCH_SIZE:
+                    break
+                try:
+                    message = file_queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                fd = _write_log_batch(fd, ''.join(batch))
+            if message is None:
+                return
+    finally:
+        if fd is not None:
+            _close_log_file(fd)
+
+def _flush_log_file_queue():
+    """Write queued messages synchronously, used when the writer thread is not running"""
+    batch = []
+    while True:
+        try:
+            message = _log_file_queue.get_nowait()
+        except queue.Empty:
+            break
+        if message is not None:
+            batch.append(message)
+    if batch:
+        fd = _write_log_batch(None, ''.join(batch))
+        if fd is not None:
+            _close_log_file(fd)
+
+def _start_log_file_writer():
+    """Start the console and device.log writer thread on first use"""
+    global _log_file_queue, _log_file_thread
+    _log_file_queue = queue.SimpleQueue()
+    _log_file_thread = threading.Thread(target=_write_log_file, args=(_log_file_queue,), name="device-log-writer", daemon=True)
+    _log_file_thread.start()
+    atexit.register(_stop_log_file_writer)
+
+def _stop_log_file_writer():
+    """Flush pending messages to the console and device.log and stop the writer thread"""
+    if _log_file_thread is not None and _log_file_thread.is_alive():
+        _log_file_queue.put(None)
+        _log_file_thread.join(timeout=1)
+
 def set_message_queue(queue):
     """Set the global message queue reference"""
     global _device_message_queue
     _device_message_queue = queue
 
-def log(message, state="info"):
+def set_debug(enabled):
+    """Enable or disable logging of debug messages"""
+    global _debug_enabled
+    _debug_enabled = enabled
+
+def is_enabled_for(state):
+    """Check if messages of a state are logged, used to skip building messages that would be dropped"""
+    return state != "debug" or _debug_enabled
+
+def log(message, state="info", *args):
     """
     Logs a message to the console, device.log file, and sends it to the message queue.
 
     Parameters:
-    message (str): The message to log.
+    message (str): The message to log, %-formatted with args only if the message is logged.
     state (str): The state of the message (must be one of LOG_STATES keys).
+    args: Optional values to format into the message.
     """
-    if state not in LOG_STATES:
-        state = "info"  # Default to info if invalid state
+    if state == "debug" and not _debug_enabled:
+        return
 
-    # Use consistent timestamp format
-    timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    formatted_message = f"{timestamp} [{LOG_STATES[state]}] {message}"
+    if args:
+        message = message % args
+
+    prefix = _LOG_PREFIXES.get(state)
+    if prefix is None:
+        state = "info"  # Default to info if invalid state
+        prefix = _INFO_PREFIX
 
-    # Print to console
-    print(formatted_message)
+    # Use consistent timestamp format, building the line in a single f-string
+    line = f"{_get_timestamp()} {prefix} {message}\n"
 
-    # Write to device.log file
-    log_dir = os.path.join(os.path.dirname(__file__), '..', 'logs')
-    os.makedirs(log_dir, exist_ok=True)
+    # Queue for the writer thread, which writes to the console and device.log
+    if _log_file_queue is None:
+        _start_log_file_writer()
+    _log_file_queue.put(line)
 
-    device_log_path = os.path.join(log_dir, 'device.log')
-    with open(device_log_path, 'a') as f:
-        f.write(formatted_message + '\n')
+    # Write directly if the writer thread has stopped, so no line is left in the queue
+    if not _log_file_thread.is_alive():
+        _flush_log_file_queue()
 
     # Send to message queue if available
     if _device_message_queue:
@@ -13,8 +13,65 @@ _repo_root = Path(__file__).parent.parent.parent
 if str(_repo_root) not in sys.path:
     sys.path.insert(0, str(_repo_root))
 
-from .constants import *
-from .models import *
-from .managers import *
+from .constants import (
+    TEST_COMMANDS,
+    EXPERIMENT_COMMANDS,
+    TEST_STATES,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    INPUT_TEST_TIMEOUT,
+    PADDING,
+    SECTION_PADDING,
+    TOTAL_WIDTH,
+    PANEL_WIDTH,
+    PANEL_HEIGHT,
+    COLUMN_WIDTH,
+    HEADING_HEIGHT,
+    UPDATE_INTERVAL,
+    AVAILABLE_TRIAL_TYPES,
+    TRIAL_EVENTS
+)
+from .models import Trial, Timeline, Config, Experiment
+from .managers import (
+    ExperimentManager,
+    TestStateManager,
+    TestCommandValidator,
+    TestStateFormatter,
+    CommunicationMessageBuilder,
+    CommunicationMessageParser,
+    StatisticsManager
+)
 
 from version import __version__, VERSION
+
+__all__ = [
+    'TEST_COMMANDS',
+    'EXPERIMENT_COMMANDS',
+    'TEST_STATES',
+    'DEFAULT_HOST',
+    'DEFAULT_PORT',
+    'INPUT_TEST_TIMEOUT',
+    'PADDING',
+    'SECTION_PADDING',
+    'TOTAL_WIDTH',
+    'PANEL_WIDTH',
+    'PANEL_HEIGHT',
+    'COLUMN_WIDTH',
+    'HEADING_HEIGHT',
+    'UPDATE_INTERVAL',
+    'AVAILABLE_TRIAL_TYPES',
+    'TRIAL_EVENTS',
+    'Trial',
+    'Timeline',
+    'Config',
+    'Experiment',
+    'ExperimentManager',
+    'TestStateManager',
+    'TestCommandValidator',
+    'TestStateFormatter',
+    'CommunicationMessageBuilder',
+    'CommunicationMessageParser',
+    'StatisticsManager',
+    '__version__',
+    'VERSION'
+]
@@ -6,20 +6,20 @@ Description: Shared constants between the device and control panel
 License: MIT
 """
 
-# Test commands
-TEST_COMMANDS = [
+# Test commands, a frozenset since they are only used for membership checks
+TEST_COMMANDS = frozenset({
     "test_water_delivery",
     "test_input_levers",
     "test_input_ir",
     "test_led_port",
     "test_displays",
     "test_led_levers",
-]
+})
 
 # Experiment commands
-EXPERIMENT_COMMANDS = [
+EXPERIMENT_COMMANDS = frozenset({
     "stop_experiment"
-]
+})
 
 # Test states
 TEST_STATES = {
@@ -29,16 +29,6 @@ TEST_STATES = {
     "RUNNING": 2,
 }
 
-# Log states
-LOG_STATES = {
-    "start": "Start",
-    "success": "Success",
-    "error": "Error",
-    "warning": "Warning",
-    "info": "Info",
-    "debug": "Debug",
-}
-
 # Communication constants
 DEFAULT_HOST = ""
 DEFAULT_PORT = 8765
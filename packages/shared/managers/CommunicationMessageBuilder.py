@@ -6,11 +6,35 @@ Description: Utility class for building standardized messages for communication
 License: MIT
 """
 
-from typing import Dict, Any
+import json
+from functools import lru_cache
+from typing import Callable, Dict, Any
+
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _json_dumps = json.dumps
 
 class CommunicationMessageBuilder:
     """Utility class for building standardized messages"""
 
+    @staticmethod
+    def serialize(message: Dict[str, Any]) -> str:
+        """Serialize a message to a JSON string for sending"""
+        return _json_dumps(message)
+
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def serialize_cached(builder: Callable[..., Dict[str, Any]], *args) -> str:
+        """
+        Build and serialize a message from hashable arguments, caching the
+        result for messages that are sent repeatedly with the same arguments
+        """
+        return _json_dumps(builder(*args))
+
     @staticmethod
     def input_state(data: Dict[str, Any], version: str = "unknown") -> Dict[str, Any]:
         """Build an input state message"""
@@ -7,7 +7,16 @@ License: MIT
 """
 
 import json
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Test commands that take a duration parameter
+_DURATION_COMMANDS = frozenset({"test_water_delivery", "test_nose_light"})
 
 class CommunicationMessageParser:
     """Utility class for parsing and validating messages"""
@@ -16,10 +25,18 @@ class CommunicationMessageParser:
     def parse_message(message: str) -> Optional[Dict[str, Any]]:
         """Parse a message string into a dictionary"""
         try:
-            return json.loads(message)
+            return _json_loads(message)
         except json.JSONDecodeError:
+            # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
             return None
 
+    @staticmethod
+    def is_command_message(message: Union[str, bytes]) -> bool:
+        """Check if a message is a command string rather than JSON, without parsing it"""
+        if isinstance(message, bytes):
+            return not message.lstrip().startswith((b"{", b"["))
+        return not message.lstrip().startswith(("{", "["))
+
     @staticmethod
     def parse_test_command(command: str) -> tuple[str, Dict[str, Any]]:
         """Parse a test command and extract parameters"""
@@ -28,7 +45,7 @@ class CommunicationMessageParser:
         parameters = {}
 
         # Parse duration parameters for commands that support them
-        if base_command in ["test_water_delivery", "test_nose_light"] and len(parts) > 1:
+        if base_command in _DURATION_COMMANDS and len(parts) > 1:
             try:
                 parameters["duration_ms"] = int(parts[1])
             except ValueError:
@@ -6,7 +6,6 @@ Description: Manager for experiments, handles saving and loading experiments fro
 License: MIT
 """
 
-import json
 import os
 from typing import List, Optional
 from ..models import Experiment
@@ -32,9 +31,8 @@ class ExperimentManager:
                 if filename.endswith('.json'):
                     name = filename[:-5]
                     try:
-                        with open(os.path.join(self.experiments_dir, filename), 'r') as f:
-                            experiment_data = json.load(f)
-                            self.experiments[name] = Experiment.from_dict(experiment_data)
+                        with open(os.path.join(self.experiments_dir, filename), 'r', encoding='utf-8') as f:
+                            self.experiments[name] = Experiment.from_json(f.read())
                     except Exception as e:
                         print(f"Error loading experiment {name}: {e}")
 
@@ -45,7 +43,7 @@ class ExperimentManager:
             experiment.update_modified_time()
 
             filename = os.path.join(self.experiments_dir, f"{experiment.name}.json")
-            with open(filename, 'w') as f:
+            with open(filename, 'w', encoding='utf-8') as f:
                 f.write(experiment.to_json())
             self.experiments[experiment.name] = experiment
             return True
@@ -9,50 +9,42 @@ License: MIT
 from typing import Dict, Any
 from ..constants import TEST_COMMANDS, TEST_STATES
 
+# Test states of a completed test
+_COMPLETED_TEST_STATES = frozenset({TEST_STATES["PASSED"], TEST_STATES["FAILED"]})
+
+# Test commands that take a duration parameter
+_DURATION_TEST_COMMANDS = frozenset({"test_water_delivery", "test_led_port", "test_displays", "test_led_levers"})
+
 class TestStateManager:
     """Manages test states across the application"""
 
     def __init__(self):
+        # Flat map of test name to state, nested under "state" only when sent
         self._test_state = {
-            "test_water_delivery": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
-            "test_input_levers": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
-            "test_input_ir": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
-            "test_led_port": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
-            "test_led_levers": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
-            "test_displays": {
-                "state": TEST_STATES["NOT_TESTED"],
-            },
+            "test_water_delivery": TEST_STATES["NOT_TESTED"],
+            "test_input_levers": TEST_STATES["NOT_TESTED"],
+            "test_input_ir": TEST_STATES["NOT_TESTED"],
+            "test_led_port": TEST_STATES["NOT_TESTED"],
+            "test_led_levers": TEST_STATES["NOT_TESTED"],
+            "test_displays": TEST_STATES["NOT_TESTED"],
         }
 
     def get_test_state(self, test_name: str) -> int:
         """Get the current state of a test"""
-        if test_name in self._test_state:
-            return self._test_state[test_name]["state"]
-        return TEST_STATES["NOT_TESTED"]
+        return self._test_state.get(test_name, TEST_STATES["NOT_TESTED"])
 
     def set_test_state(self, test_name: str, state: int):
         """Set the state of a test"""
         if test_name in self._test_state:
-            self._test_state[test_name]["state"] = state
+            self._test_state[test_name] = state
 
     def get_all_test_states(self) -> Dict[str, Any]:
-        """Get all test states"""
-        return self._test_state.copy()
+        """Get all test states, as a new {test_name: {"state": state}} dict"""
+        return {test_name: {"state": state} for test_name, state in self._test_state.items()}
 
     def reset_test_states(self):
         """Reset all test states to NOT_TESTED"""
-        for test_name in self._test_state:
-            self._test_state[test_name]["state"] = TEST_STATES["NOT_TESTED"]
+        self._test_state = dict.fromkeys(self._test_state, TEST_STATES["NOT_TESTED"])
 
     def is_test_running(self, test_name: str) -> bool:
         """Check if a test is currently running"""
@@ -61,7 +53,7 @@ class TestStateManager:
     def is_test_completed(self, test_name: str) -> bool:
         """Check if a test has completed (passed or failed)"""
         state = self.get_test_state(test_name)
-        return state in [TEST_STATES["PASSED"], TEST_STATES["FAILED"]]
+        return state in _COMPLETED_TEST_STATES
 
     def get_running_tests(self) -> list[str]:
         """Get list of currently running tests"""
@@ -93,7 +85,7 @@ class TestCommandValidator:
             return False, f"Unknown test command: {base_command}"
 
         # Validate duration parameters for commands that support them
-        if base_command in ["test_water_delivery", "test_led_port", "test_displays", "test_led_levers"]:
+        if base_command in _DURATION_TEST_COMMANDS:
             if len(parts) > 1:
                 try:
                     duration = int(parts[1])
@@ -107,7 +99,7 @@ class TestCommandValidator:
     @staticmethod
     def get_supported_test_commands() -> list[str]:
         """Get list of supported test commands"""
-        return TEST_COMMANDS.copy()
+        return sorted(TEST_COMMANDS)
 
 
 class TestStateFormatter:
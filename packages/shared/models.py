@@ -8,12 +8,27 @@ License: MIT
 
 import json
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from datetime import datetime
 
 from version import VERSION
 
-@dataclass
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, indent=2)
+
+@dataclass(slots=True)
 class Trial:
     """A single trial in the experiment timeline"""
     type: str
@@ -23,14 +38,19 @@ class Trial:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert trial to dictionary"""
-        return asdict(self)
+        return {
+            "type": self.type,
+            "id": self.id,
+            "parameters": dict(self.parameters) if self.parameters is not None else None,
+            "description": self.description
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Trial':
         """Create trial from dictionary"""
         return cls(**data)
 
-@dataclass
+@dataclass(slots=True)
 class Timeline:
     """A sequence of trials that make up an experiment timeline"""
     trials: List[Trial] = None
@@ -88,7 +108,7 @@ class Timeline:
         trials = [Trial.from_dict(trial_data) for trial_data in data.get("trials", [])]
         return cls(trials=trials)
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     """Experiment-wide configuration parameters"""
     iti_minimum: int = 100
@@ -103,7 +123,17 @@ class Config:
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
-        return asdict(self)
+        return {
+            "iti_minimum": self.iti_minimum,
+            "iti_maximum": self.iti_maximum,
+            "response_limit": self.response_limit,
+            "cue_minimum": self.cue_minimum,
+            "cue_maximum": self.cue_maximum,
+            "hold_minimum": self.hold_minimum,
+            "hold_maximum": self.hold_maximum,
+            "valve_open": self.valve_open,
+            "punish_time": self.punish_time
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Config':
@@ -160,7 +190,7 @@ class Experiment:
 
     def to_json(self) -> str:
         """Convert experiment to JSON string"""
-        return json.dumps(self.to_dict(), indent=2)
+        return _json_dumps(self.to_dict())
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Experiment':
@@ -185,7 +215,7 @@ class Experiment:
     @classmethod
     def from_json(cls, json_str: str) -> 'Experiment':
         """Create experiment from JSON string"""
-        data = json.loads(json_str)
+        data = _json_loads(json_str)
         return cls.from_dict(data)
 
     def validate(self) -> tuple[bool, List[str]]: